@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from services.ingestion_service import DEFAULT_BATCH_SIZE, DEFAULT_WINDOW_SECONDS, submit_entries, invalid_values
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESPONSE_TIMEOUT_SECONDS = 120
+
+
+class IngestionServer(ThreadingHTTPServer):
+    # Muitos dispositivos enviam ao mesmo tempo; a fila padrão de 5 conexões recusaria envios
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class IngestionHandler(BaseHTTPRequestHandler):
+    # POST /series/<nome_serie>/entries com um registro ou uma lista de registros em JSON
+    batch_size = DEFAULT_BATCH_SIZE
+    window_seconds = DEFAULT_WINDOW_SECONDS
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"erro": "Rota não encontrada."})
+
+    def do_POST(self):
+        from database.configuration_service import get_configuration
+
+        parts = [unquote(part) for part in self.path.strip("/").split("/")]
+        if len(parts) != 3 or parts[0] != "series" or parts[2] != "entries":
+            self.send_json(404, {"erro": "Rota não encontrada."})
+            return
+
+        config = get_configuration(parts[1])
+        if config is None:
+            self.send_json(404, {"erro": f"Configuração '{parts[1]}' não encontrada."})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        except ValueError:
+            self.send_json(400, {"erro": "Corpo da requisição não é um JSON válido."})
+            return
+
+        entries = body if isinstance(body, list) else [body]
+        required_columns = set(config["auxiliary_variables"] + [config["series_column"], config["analysis_variable"]])
+        if not entries or not all(isinstance(entry, dict) and required_columns.issubset(entry) for entry in entries):
+            self.send_json(400, {"erro": f"Cada registro deve conter as colunas: {', '.join(sorted(required_columns))}"})
+            return
+
+        errors = invalid_values(config, entries)
+        if errors:
+            self.send_json(400, {"erro": "Valores inválidos nos registros.", "detalhes": errors})
+            return
+
+        try:
+            result = submit_entries(config["nome_serie"], entries, self.batch_size, self.window_seconds).result(RESPONSE_TIMEOUT_SECONDS)
+        except Exception as e:
+            self.send_json(500, {"erro": f"Erro ao validar os registros: {e}"})
+            return
+
+        self.send_json(200, {"resultados": json.loads(result.to_json(orient="records"))})
+
+    def send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP local para cadastro de registros em micro-lotes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Registros máximos por lote validado.")
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_SECONDS * 1000, help="Espera máxima para completar um lote.")
+    args = parser.parse_args(argv)
+
+    IngestionHandler.batch_size = args.batch_size
+    IngestionHandler.window_seconds = args.window_ms / 1000
+
+    server = IngestionServer((args.host, args.port), IngestionHandler)
+    print(f"API de cadastro em http://{args.host}:{args.port}/series/<nome_serie>/entries")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    # O banco e os modelos salvos usam caminhos relativos à raiz do projeto
+    os.chdir(ROOT_DIR)
+    sys.exit(main())
@@ -1,9 +1,20 @@
 import streamlit as st
-from views.config_page import configure_series, initialize_series_configurations
-from views.register_page import show_register
-from views.visualization_page import show_visualization
+from views.config_page import initialize_series_configurations
+from services.job_runner import start_worker
 
 initialize_series_configurations()
+start_worker()
+
+
+def warm_up_active_series():
+    # Carrega os modelos salvos em disco uma vez por sessão e série, apenas nas páginas que validam dados
+    from database.dynamic_table_service import warm_up_models
+
+    warmed_series = st.session_state.setdefault("warmed_series", set())
+    if st.session_state["config"]["nome_serie"] not in warmed_series:
+        warm_up_models(st.session_state["config"])
+        warmed_series.add(st.session_state["config"]["nome_serie"])
+
 
 if st.session_state["config"]:
     st.sidebar.write(f"Série Ativa: {st.session_state['config']['nome_serie']}")
@@ -11,12 +22,23 @@ else:
     menu = "Configurar Série"
 
 st.title("Sistema de Detecção de Anomalias com IA")
-menu = st.sidebar.radio("Menu", ["Configurar Série", "Visualizar Dados", "Cadastrar Dados"])
-
+menu = st.sidebar.radio("Menu", ["Configurar Série", "Visualizar Dados", "Cadastrar Dados", "Diagnóstico"])
 
+# Cada página é importada só quando selecionada: Altair, st_aggrid e o scikit-learn
+# não atrasam a abertura do app
 if menu == "Configurar Série":
-   configure_series()
+    from views.config_page import configure_series
+    configure_series()
 elif menu == "Visualizar Dados":
+    from views.visualization_page import show_visualization
+    if st.session_state["config"]:
+        warm_up_active_series()
     show_visualization()
 elif menu == "Cadastrar Dados":
-    show_register() 
+    from views.register_page import show_register
+    if st.session_state["config"]:
+        warm_up_active_series()
+    show_register()
+elif menu == "Diagnóstico":
+    from views.diagnostics_page import show_diagnostics
+    show_diagnostics()
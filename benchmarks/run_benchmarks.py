@@ -0,0 +1,191 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def measure(operation, repetitions: int, rows: int, setup=None):
+    latencies = []
+    for _ in range(repetitions):
+        arguments = setup() if setup else ()
+        start = time.perf_counter()
+        operation(*arguments)
+        latencies.append(time.perf_counter() - start)
+
+    # O pico de memória é medido em uma execução separada, pois o tracemalloc distorce os tempos
+    arguments = setup() if setup else ()
+    tracemalloc.start()
+    operation(*arguments)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = np.array(latencies)
+    return {
+        "rows": rows,
+        "repetitions": repetitions,
+        "rows_per_second": round(rows * repetitions / latencies.sum(), 2) if latencies.sum() else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "peak_memory_mb": round(peak_memory / 1024 / 1024, 3),
+    }
+
+
+def run_size(rows: int, batch_size: int, repetitions: int, breeds: int, auxiliary_columns: int, anomaly_rate: float):
+    from benchmarks.workload import generate_lactation, workload_config
+    from database import query_cache
+    from database.dynamic_table_service import create_dynamic_table, save_data, load_data, update_data
+    from services.validation_service import validate_and_suggest, fit_models, rescore_entries
+    from views.visualization_page import apply_filters
+
+    table_name = f"serie_benchmark_{rows}"
+    data, injected = generate_lactation(rows + batch_size * repetitions, breeds, auxiliary_columns, anomaly_rate)
+    history, batches = data.iloc[:rows], data.iloc[rows:]
+    config = workload_config(data, table_name)
+
+    results = {}
+
+    create_dynamic_table(table_name, history)
+    save_data(table_name, history.copy(), config)
+
+    stored = history_stored = load_data(table_name)
+    batch_iter = itertools.count()
+
+    def next_batch():
+        index = next(batch_iter) % repetitions
+        return (batches.iloc[index * batch_size:(index + 1) * batch_size].copy(),)
+
+    results["validate_and_suggest"] = measure(
+        lambda batch: validate_and_suggest(stored, batch, config), repetitions, batch_size, next_batch
+    )
+    results["save_data"] = measure(lambda batch: save_data(table_name, batch, config), repetitions, batch_size, next_batch)
+
+    def load_cold():
+        query_cache.clear()
+        return load_data(table_name)
+
+    results["load_data"] = measure(load_cold, repetitions, rows)
+
+    stored = load_data(table_name)
+    seeds = itertools.count()
+
+    def edited_rows():
+        edited = stored.sample(min(batch_size, len(stored)), random_state=next(seeds)).copy()
+        edited["producao_kg"] = np.round(edited["producao_kg"] * 1.01, 2)
+        return (edited,)
+
+    results["update_data"] = measure(lambda rows_: update_data(table_name, rows_, config), repetitions, batch_size, edited_rows)
+
+    filters = {
+        "semana": (5, 30),
+        "raca": sorted(stored["raca"].unique().tolist())[: max(breeds // 2, 1)],
+        "aux_1": (20.0, 30.0) if "aux_1" in stored.columns else None,
+    }
+    filters = {col: value for col, value in filters.items() if value is not None}
+    results["apply_filters"] = measure(lambda: apply_filters(stored, filters), repetitions, len(stored))
+
+    # O histórico é reavaliado, depois das medições, com os modelos que validate_and_suggest treinou
+    # sobre ele (já em cache). Uma taxa detectada muito acima da injetada reduz os conjuntos de
+    # treino e distorce os tempos medidos
+    detected, _ = rescore_entries(history_stored, config, fit_models(history_stored, config))
+    injected = injected[:rows]
+    anomaly_rates = {
+        "injected": round(float(injected.mean()), 4),
+        "detected": round(float(detected.mean()), 4),
+        "injected_detected": round(float(detected[injected].mean()), 4) if injected.any() else None,
+    }
+
+    return results, anomaly_rates
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    regressions = []
+    baseline_index = {(entry["operation"], entry["history_rows"]): entry for entry in baseline.get("results", [])}
+    for entry in results["results"]:
+        previous = baseline_index.get((entry["operation"], entry["history_rows"]))
+        if not previous or not previous.get("p50_ms"):
+            continue
+        change = entry["p50_ms"] / previous["p50_ms"] - 1
+        if change > tolerance:
+            regressions.append({"operation": entry["operation"], "history_rows": entry["history_rows"], "p50_change": round(change, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de validação e persistência das séries.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Tamanhos do histórico (linhas).")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Linhas por lote validado/salvo.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--breeds", type=int, default=10)
+    parser.add_argument("--auxiliary-columns", type=int, default=2)
+    parser.add_argument("--anomaly-rate", type=float, default=0.01)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline", help="Resultado anterior para detectar regressões.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento máximo aceito na mediana (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    work_dir = tempfile.mkdtemp(prefix="benchmark_")
+    os.makedirs(os.path.join(work_dir, "data"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'data', 'series.db')}"
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(work_dir)
+
+    report = {
+        "metadata": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "batch_size": args.batch_size,
+            "breeds": args.breeds,
+            "auxiliary_columns": args.auxiliary_columns,
+            "anomaly_rate": args.anomaly_rate,
+        },
+        "results": [],
+        "anomaly_rates": [],
+    }
+
+    for rows in args.sizes:
+        size_results, anomaly_rates = run_size(rows, args.batch_size, args.repetitions, args.breeds, args.auxiliary_columns, args.anomaly_rate)
+        report["anomaly_rates"].append({"history_rows": rows, **anomaly_rates})
+        print(f"{rows:>10} anomalias injetadas {anomaly_rates['injected']:.2%}  detectadas {anomaly_rates['detected']:.2%}")
+        for operation, metrics in size_results.items():
+            report["results"].append({"operation": operation, "history_rows": rows, **metrics})
+            print(f"{rows:>10} {operation:<22} {metrics['rows_per_second']:>14} linhas/s  p50 {metrics['p50_ms']:>10} ms  p99 {metrics['p99_ms']:>10} ms")
+
+    exit_code = 0
+    if args.baseline:
+        with open(baseline_path, encoding="utf-8") as baseline_file:
+            report["regressions"] = compare(report, json.load(baseline_file), args.tolerance)
+        for regression in report["regressions"]:
+            print(f"Regressão: {regression['operation']} ({regression['history_rows']} linhas) +{regression['p50_change']:.0%}")
+        exit_code = 1 if report["regressions"] else 0
+
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Resultados gravados em {output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
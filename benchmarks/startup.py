@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.run_benchmarks import ROOT_DIR, compare, git_revision
+
+DEFAULT_MODULES = [
+    "streamlit",
+    "views.config_page",
+    "views.visualization_page",
+    "views.register_page",
+    "views.diagnostics_page",
+    "database.configuration_service",
+    "database.dynamic_table_service",
+    "services.validation_service",
+]
+PAGES = ["Visualizar Dados", "Cadastrar Dados", "Diagnóstico"]
+HEAVY_MODULES = ["sklearn", "altair", "st_aggrid", "scipy", "joblib"]
+
+# Cada medição roda em um interpretador novo, para que nenhum módulo já esteja carregado
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+timings = {{}}
+start = time.perf_counter()
+app = AppTest.from_file({app_path!r}, default_timeout=120).run()
+timings["first_render"] = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+
+for page in {pages!r}:
+    start = time.perf_counter()
+    app.sidebar.radio[0].set_value(page).run()
+    timings["page:" + page] = time.perf_counter() - start
+
+print(json.dumps({{"timings": timings, "loaded": loaded, "errors": [str(error.value) for error in app.exception]}}))
+"""
+
+
+def run_python(script: str, env: dict):
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=env["BENCHMARK_DIR"], env=env, text=True, stderr=subprocess.DEVNULL)
+    return output.strip().splitlines()[-1]
+
+
+def summarize(operation: str, latencies):
+    latencies = np.array(latencies)
+    return {
+        "operation": operation,
+        "history_rows": 0,
+        "repetitions": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de importação dos módulos e de primeira renderização do app.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--output", default="startup_output.json")
+    parser.add_argument("--baseline", help="Resultado anterior para detectar regressões.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento máximo aceito na mediana (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    # Banco vazio em um diretório temporário, como na primeira abertura do app
+    work_dir = tempfile.mkdtemp(prefix="benchmark_startup_")
+    os.makedirs(os.path.join(work_dir, "data"))
+    env = {
+        **os.environ,
+        "BENCHMARK_DIR": work_dir,
+        "DATABASE_URL": f"sqlite:///{os.path.join(work_dir, 'data', 'series.db')}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")])),
+    }
+
+    report = {
+        "metadata": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": [],
+    }
+
+    for module in args.modules:
+        latencies = [float(run_python(IMPORT_SCRIPT.format(module=module), env)) for _ in range(args.repetitions)]
+        report["results"].append(summarize(f"import:{module}", latencies))
+
+    renders = []
+    script = RENDER_SCRIPT.format(app_path=os.path.join(ROOT_DIR, "app.py"), heavy=HEAVY_MODULES, pages=PAGES)
+    for _ in range(args.repetitions):
+        renders.append(json.loads(run_python(script, env)))
+    for operation in renders[0]["timings"]:
+        report["results"].append(summarize(operation, [render["timings"][operation] for render in renders]))
+    report["loaded_after_first_render"] = renders[0]["loaded"]
+    report["errors"] = renders[0]["errors"]
+
+    for entry in report["results"]:
+        print(f"{entry['operation']:<40} p50 {entry['p50_ms']:>10} ms  p99 {entry['p99_ms']:>10} ms")
+    print(f"Módulos pesados carregados na primeira renderização: {', '.join(report['loaded_after_first_render']) or 'nenhum'}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(os.path.abspath(args.baseline), encoding="utf-8") as baseline_file:
+            report["regressions"] = compare(report, json.load(baseline_file), args.tolerance)
+        for regression in report["regressions"]:
+            print(f"Regressão: {regression['operation']} +{regression['p50_change']:.0%}")
+        exit_code = 1 if report["regressions"] else 0
+
+    output = os.path.abspath(args.output)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Resultados gravados em {output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Lactacao.csv")
+
+
+def load_base_curves(path: str = BASE_FILE):
+    base = pd.read_csv(path)
+    curves = base.groupby(["raca", "semana"])["producao_kg"].mean()
+    return {raca: curves[raca].sort_index().to_numpy(dtype=float) for raca in curves.index.get_level_values("raca").unique()}
+
+
+def generate_lactation(
+    rows: int,
+    breeds: int = 10,
+    auxiliary_columns: int = 2,
+    anomaly_rate: float = 0.01,
+    seed: int = 42,
+):
+    # Expande as curvas de lactação de data/Lactacao.csv para o tamanho pedido:
+    # cada raça sintética herda a curva de uma raça original com escala e ruído próprios
+    rng = np.random.default_rng(seed)
+    base_curves = load_base_curves()
+    base_names = sorted(base_curves)
+
+    breed_names = base_names[:breeds] + [f"Raca_{index}" for index in range(len(base_names), breeds)]
+    breed_bases = [base_names[index % len(base_names)] for index in range(len(breed_names))]
+    breed_scales = np.where(np.arange(len(breed_names)) < len(base_names), 1.0, rng.uniform(0.7, 1.3, len(breed_names)))
+
+    breed_index = rng.integers(0, len(breed_names), rows)
+    weeks = np.empty(rows, dtype=np.int64)
+    production = np.empty(rows, dtype=float)
+    for index, base_name in enumerate(breed_bases):
+        mask = breed_index == index
+        curve = base_curves[base_name]
+        positions = np.arange(mask.sum()) % len(curve)
+        weeks[mask] = positions + 1
+        production[mask] = curve[positions] * breed_scales[index]
+
+    production = np.round(production * rng.normal(1.0, 0.05, rows), 2)
+
+    data = pd.DataFrame({
+        "semana": weeks,
+        "raca": np.array(breed_names, dtype=object)[breed_index],
+        "producao_kg": production,
+    })
+    for index in range(auxiliary_columns):
+        data[f"aux_{index + 1}"] = np.round(rng.normal(25.0, 5.0, rows), 2)
+
+    # Anomalias injetadas: picos e quedas bruscas da produção
+    anomalies = rng.random(rows) < anomaly_rate
+    factors = rng.choice([0.1, 2.5, 4.0], anomalies.sum())
+    data.loc[anomalies, "producao_kg"] = np.round(data.loc[anomalies, "producao_kg"] * factors, 2)
+
+    return data, anomalies
+
+
+def workload_config(data: pd.DataFrame, table_name: str):
+    auxiliary_variables = ["raca"] + [col for col in data.columns if col.startswith("aux_")]
+    return {
+        "nome_serie": table_name,
+        "dynamic_table_name": table_name,
+        "series_column": "semana",
+        "analysis_variable": "producao_kg",
+        "auxiliary_variables": auxiliary_variables,
+        "filters": {},
+        # Sem as regras de média e último valor: cada semana mistura raças com níveis de produção
+        # até 2,5x diferentes, e uma queda injetada aceita como último valor faria todos os valores
+        # seguintes da semana serem anomalias (cerca de 85% das linhas, contra 1% injetado)
+        "validations": {
+            "min_value": 0.0,
+            "max_value": 200.0,
+            "validate_mean": False,
+            "validate_last": False,
+        },
+        "contamination": 0.01,
+    }
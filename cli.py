@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_SUFFIX = "_validado"
+
+
+def output_path(path: str, output_dir: str = None):
+    stem, extension = os.path.splitext(os.path.basename(path))
+    return os.path.join(output_dir or os.path.dirname(path), f"{stem}{OUTPUT_SUFFIX}{extension}")
+
+
+def write_output(data: pd.DataFrame, path: str):
+    if path.endswith(".xlsx"):
+        data.to_excel(path, index=False)
+    elif path.endswith(".parquet"):
+        data.to_parquet(path, index=False)
+    else:
+        data.to_csv(path, index=False)
+
+
+def check_columns(columns, config: dict):
+    required_columns = set(config["auxiliary_variables"] + [config["series_column"], config["analysis_variable"]])
+    missing = required_columns - set(columns)
+    if missing:
+        raise ValueError(f"colunas ausentes: {', '.join(sorted(missing))}")
+
+
+def process_file(path: str, config: dict, write: bool, output_dir: str, workers: int, chunk_size: int):
+    from database.dynamic_table_service import import_data, validate_data
+    from services.import_service import iter_chunks, count_rows
+
+    with open(path, "rb") as source:
+        total = count_rows(source)
+
+        if write:
+            # Cada bloco é validado e gravado na tabela da série em sua própria transação
+            def check_chunks():
+                for chunk in iter_chunks(source, chunk_size):
+                    check_columns(chunk.columns, config)
+                    yield chunk
+
+            def report_progress(rows):
+                print(f"  {rows} de {total} linhas gravadas", file=sys.stderr)
+
+            return import_data(
+                config["dynamic_table_name"], check_chunks(), config, parallel=True, progress_callback=report_progress, max_workers=workers
+            )
+
+        # Sem gravação o arquivo é validado inteiro, para as regras enxergarem as linhas anteriores do próprio arquivo
+        data = pd.concat(list(iter_chunks(source, chunk_size)), ignore_index=True)
+
+    check_columns(data.columns, config)
+    validated_data = validate_data(data, config["dynamic_table_name"], config, parallel=True, max_workers=workers)
+    write_output(validated_data, output_path(path, output_dir))
+    return len(validated_data), int(validated_data["anomalia"].sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida arquivos CSV, Excel ou Parquet com a configuração de uma série, sem o Streamlit.")
+    parser.add_argument("nome_serie", help="Nome da configuração cadastrada em configuracoes_serie.")
+    parser.add_argument("files", nargs="+", help="Arquivos .csv, .xlsx ou .parquet.")
+    parser.add_argument("--write", action="store_true", help="Grava as linhas validadas na tabela da série.")
+    parser.add_argument("--output-dir", help=f"Pasta dos arquivos anotados (padrão: a do arquivo de entrada, com sufixo {OUTPUT_SUFFIX}).")
+    parser.add_argument("--workers", type=int, default=None, help="Processos usados na validação (padrão: número de CPUs).")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Linhas lidas por bloco.")
+    args = parser.parse_args(argv)
+
+    files = [os.path.abspath(path) for path in args.files]
+    output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
+
+    # O banco e os modelos salvos usam caminhos relativos à raiz do projeto
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)
+
+    from database.configuration_service import get_configuration
+    from services.import_service import CHUNK_SIZE
+
+    config = get_configuration(args.nome_serie)
+    if config is None:
+        print(f"Configuração '{args.nome_serie}' não encontrada.", file=sys.stderr)
+        return 2
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    exit_code = 0
+    for path in files:
+        start = time.perf_counter()
+        try:
+            rows, anomalies = process_file(path, config, args.write, output_dir, args.workers, args.chunk_size or CHUNK_SIZE)
+        except Exception as e:
+            print(f"{path}: erro ao validar o arquivo: {e}", file=sys.stderr)
+            exit_code = 1
+            continue
+        destination = config["dynamic_table_name"] if args.write else output_path(path, output_dir)
+        print(f"{path}: {rows} linhas, {anomalies} anomalias, {time.perf_counter() - start:.1f}s -> {destination}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
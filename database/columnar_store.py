@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import pandas as pd
+from sqlalchemy import Integer, Float, Boolean
+
+from database.database_config import engine
+from database.table_catalog import get_table
+from database.table_version_service import get_write_version
+from services.diagnostics import span, increment
+
+# Cópia colunar opcional das tabelas das séries, em arquivos Arrow IPC sem compressão
+# (lidos por memory map). O SQLite continua sendo a fonte da verdade: toda escrita passa
+# por ele, e a cópia é reconstruída quando a versão de escrita do manifesto deixa de
+# corresponder à do banco (database/table_version_service.py).
+STORE_DIR = os.environ.get("COLUMNAR_STORE_DIR", os.path.join("data", "columnar"))
+MAX_PARTS = 16
+
+_lock = threading.Lock()
+
+
+def enabled():
+    return os.environ.get("COLUMNAR_STORE", "").lower() in ("1", "true", "sim")
+
+
+def _table_dir(table_name: str):
+    return os.path.join(STORE_DIR, table_name)
+
+
+def _manifest_path(table_name: str):
+    return os.path.join(_table_dir(table_name), "manifest.json")
+
+
+def _read_manifest(table_name: str):
+    try:
+        with open(_manifest_path(table_name), encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(table_name: str, manifest: dict):
+    # Substituição atômica: leitores nunca veem um manifesto pela metade
+    path = _manifest_path(table_name)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(f"{path}.tmp", path)
+
+
+def _schema(dynamic_table):
+    import pyarrow as pa
+
+    fields = []
+    for column in dynamic_table.columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _to_arrow(dynamic_table, frame: pd.DataFrame):
+    import pyarrow as pa
+
+    schema = _schema(dynamic_table)
+    frame = frame.reindex(columns=schema.names)
+    for field in schema:
+        if pa.types.is_integer(field.type):
+            frame[field.name] = pd.to_numeric(frame[field.name], errors="coerce").astype("Int64")
+        elif pa.types.is_floating(field.type):
+            frame[field.name] = pd.to_numeric(frame[field.name], errors="coerce")
+        elif pa.types.is_boolean(field.type):
+            frame[field.name] = frame[field.name].astype("boolean")
+        else:
+            frame[field.name] = frame[field.name].map(lambda value: None if pd.isna(value) else str(value))
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def _write_part(table_name: str, arrow_table):
+    import pyarrow as pa
+
+    name = f"part-{uuid.uuid4().hex}.arrow"
+    with pa.OSFile(os.path.join(_table_dir(table_name), name), "wb") as sink:
+        with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    return name
+
+
+def _open_dataset(table_name: str, manifest: dict):
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    paths = [os.path.abspath(os.path.join(_table_dir(table_name), part)) for part in manifest["parts"]]
+    return ds.dataset(paths, format="ipc", filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+def drop(table_name: str):
+    with _lock:
+        shutil.rmtree(_table_dir(table_name), ignore_errors=True)
+
+
+def rebuild(table_name: str):
+    dynamic_table = get_table(table_name)
+    with span("columnar_rebuild", table=table_name) as record:
+        version = get_write_version(table_name)
+        with engine.connect() as conn:
+            data = pd.read_sql(dynamic_table.select().order_by(dynamic_table.c.id), conn)
+        record["rows"] = len(data)
+
+        # Uma escrita durante a leitura deixa a cópia sem versão: nenhum lote é acrescentado
+        # sobre ela e a próxima leitura a reconstrói
+        if get_write_version(table_name) != version:
+            version = None
+
+        with _lock:
+            shutil.rmtree(_table_dir(table_name), ignore_errors=True)
+            os.makedirs(_table_dir(table_name))
+            part = _write_part(table_name, _to_arrow(dynamic_table, data))
+            manifest = {"parts": [part], "rows": len(data), "version": version, "has_updates": False}
+            _write_manifest(table_name, manifest)
+    return manifest
+
+
+def compact(table_name: str):
+    # Junta as partes em um único arquivo; versões antigas de linhas editadas são descartadas
+    with _lock:
+        manifest = _read_manifest(table_name)
+        if manifest is None or (len(manifest["parts"]) <= 1 and not manifest["has_updates"]):
+            return manifest
+
+        with span("columnar_compact", table=table_name, parts=len(manifest["parts"])):
+            data = _open_dataset(table_name, manifest).to_table().to_pandas()
+            data = data.drop_duplicates("id", keep="last").sort_values("id", kind="stable")
+            old_parts = manifest["parts"]
+            manifest = {**manifest, "parts": [_write_part(table_name, _to_arrow(get_table(table_name), data))], "has_updates": False}
+            _write_manifest(table_name, manifest)
+            for part in old_parts:
+                os.remove(os.path.join(_table_dir(table_name), part))
+    return manifest
+
+
+def _follows(manifest: dict, version: int):
+    # A escrita só é aplicada sobre a cópia da versão imediatamente anterior; caso contrário
+    # outra escrita ficou de fora e a cópia é reconstruída na próxima leitura
+    return manifest is not None and manifest.get("version") is not None and manifest["version"] == version - 1
+
+
+def append(table_name: str, inserted_data: pd.DataFrame, version: int):
+    with _lock:
+        manifest = _read_manifest(table_name)
+        if not _follows(manifest, version):
+            return
+        if not inserted_data.empty:
+            manifest["parts"].append(_write_part(table_name, _to_arrow(get_table(table_name), inserted_data)))
+            manifest["rows"] += len(inserted_data)
+        manifest["version"] = version
+        _write_manifest(table_name, manifest)
+
+    if len(manifest["parts"]) > MAX_PARTS:
+        compact(table_name)
+
+
+def apply_updates(table_name: str, updated_rows: pd.DataFrame, version: int):
+    # As linhas editadas entram como uma nova parte e substituem as anteriores na próxima compactação
+    with _lock:
+        manifest = _read_manifest(table_name)
+        if not _follows(manifest, version):
+            return
+        if not updated_rows.empty:
+            manifest["parts"].append(_write_part(table_name, _to_arrow(get_table(table_name), updated_rows)))
+            manifest["has_updates"] = True
+        manifest["version"] = version
+        _write_manifest(table_name, manifest)
+
+
+def _current_manifest(table_name: str):
+    manifest = _read_manifest(table_name)
+    # Consulta pela chave primária da tabela de versões, sem contar as linhas da série
+    if manifest is None or manifest.get("version") is None or manifest["version"] != get_write_version(table_name):
+        return rebuild(table_name)
+    if manifest["has_updates"]:
+        return compact(table_name)
+    return manifest
+
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def filter_expression(filters: dict, column_names):
+    import pyarrow.dataset as ds
+
+    expression = None
+    for col, condition in (filters or {}).items():
+        if col not in column_names:
+            continue
+        if isinstance(condition, tuple):
+            clause = (ds.field(col) >= _plain(condition[0])) & (ds.field(col) <= _plain(condition[1]))
+        elif isinstance(condition, list) and condition:
+            clause = ds.field(col).isin([_plain(value) for value in condition])
+        else:
+            continue
+        expression = clause if expression is None else expression & clause
+    return expression
+
+
+def read(table_name: str, columns: list = None, filters: dict = None, limit: int = None, offset: int = None, where=None):
+    with span("columnar_read", table=table_name) as record:
+        for attempt in range(2):
+            dataset = _open_dataset(table_name, _current_manifest(table_name))
+            expression = filter_expression(filters, dataset.schema.names)
+            if where is not None:
+                expression = where if expression is None else expression & where
+
+            # Filtros e projeção são aplicados na varredura, antes da conversão para pandas
+            try:
+                arrow_table = dataset.to_table(columns=columns, filter=expression)
+                break
+            except FileNotFoundError:
+                # Uma compactação concorrente removeu as partes; o manifesto novo é relido
+                if attempt:
+                    raise
+        if limit is not None:
+            arrow_table = arrow_table.slice(offset or 0, limit)
+        data = arrow_table.to_pandas()
+        record["rows"] = len(data)
+    increment("rows_scanned", len(data))
+    return data
@@ -1,5 +1,11 @@
-from sqlalchemy import Float, Table, Column, Integer, String, JSON, insert, select
+import threading
+
+from sqlalchemy import Float, Table, Column, Integer, String, JSON, insert, select, inspect, text
 from database.database_config import metadata, engine
+from database.series_stats_service import refresh_stats_table
+from database.online_state_service import refresh_online_states
+from database.training_sample_service import refresh_training_sample
+from database.table_version_service import get_write_version, bump_write_version
 
 configuracoes_table = Table(
     "configuracoes_serie",
@@ -13,48 +19,110 @@ configuracoes_table = Table(
     Column("validations", JSON, nullable=True),
     Column("dynamic_table_name", String, nullable=False),
     Column("contamination", Float, nullable=False),    
+    # Vocabulário fixo das variáveis categóricas usado pelos modelos (services/encoder_service.py)
+    Column("encoder", JSON, nullable=True),
 )
 
-metadata.create_all(engine)
+# O esquema é criado e migrado uma única vez por processo, no primeiro acesso,
+# e não ao importar o módulo
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            metadata.create_all(engine, tables=[configuracoes_table])
+            migrate_configuration_table()
+            _schema_ready = True
+
+
+def migrate_configuration_table():
+    # Bancos criados antes da coluna encoder recebem a coluna sem perder as configurações
+    columns = {column["name"] for column in inspect(engine).get_columns("configuracoes_serie")}
+    if "encoder" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE configuracoes_serie ADD COLUMN encoder JSON"))
+
+# Catálogo de configurações em memória, recarregado quando a versão no banco muda.
+# A versão é incrementada a cada alteração, inclusive as feitas por outros processos (api.py, cli.py)
+CATALOG_VERSION_KEY = "configuracoes_serie"
+_catalog = None
+_catalog_version = None
+
+def invalidate_catalog():
+    global _catalog
+    _catalog = None
 
 def save_configuration(config):
+    ensure_schema()
     try:
     
         with engine.connect() as conn:
             stmt = insert(configuracoes_table).values(config)
             conn.execute(stmt)
+            bump_write_version(conn, CATALOG_VERSION_KEY)
             conn.commit()
+            invalidate_catalog()
             return True
     except Exception as e:        
         conn.rollback()
         return False
 
 def update_configuration(nome_serie, config):
+    ensure_schema()
     try:
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             stmt = (
                 configuracoes_table.update()
                 .where(configuracoes_table.c.nome_serie == nome_serie)
                 .values(config)
             )
             conn.execute(stmt)
-            conn.commit()
-            return True
+            bump_write_version(conn, CATALOG_VERSION_KEY)
+
+            # A coluna da série ou a variável de análise podem ter mudado: as tabelas derivadas
+            # são recalculadas na mesma transação, sem serem removidas (outros processos as usam)
+            table_name = config.get("dynamic_table_name")
+            if table_name and inspect(conn).has_table(table_name):
+                updated = dict(conn.execute(select(configuracoes_table).where(configuracoes_table.c.nome_serie == nome_serie)).one()._mapping)
+                refresh_stats_table(conn, table_name, updated)
+                refresh_online_states(conn, table_name, updated)
+                refresh_training_sample(conn, table_name, updated)
+        invalidate_catalog()
+        return True
     except Exception as e:
-        conn.rollback()
         return False
 
 
+def save_encoder(nome_serie, encoder):
+    ensure_schema()
+    with engine.begin() as conn:
+        conn.execute(
+            configuracoes_table.update()
+            .where(configuracoes_table.c.nome_serie == nome_serie)
+            .values(encoder=encoder)
+        )
+        bump_write_version(conn, CATALOG_VERSION_KEY)
+    invalidate_catalog()
+
+
 def get_configuration(nome_serie):
-    with engine.connect() as conn:
-        stmt = select(configuracoes_table).where(configuracoes_table.c.nome_serie == nome_serie)
-        result = conn.execute(stmt).fetchone()
-    if result:
-        return dict(result)
+    for config in get_all_configurations():
+        if config["nome_serie"] == nome_serie:
+            return config
     return None
 
 def get_all_configurations():
-    with engine.connect() as conn:
-        stmt = select(configuracoes_table)
-        result = conn.execute(stmt).fetchall()
-    return [dict(row._mapping) for row in result]
\ No newline at end of file
+    global _catalog, _catalog_version
+    version = get_write_version(CATALOG_VERSION_KEY)
+    if _catalog is None or _catalog_version != version:
+        ensure_schema()
+        with engine.connect() as conn:
+            stmt = select(configuracoes_table)
+            result = conn.execute(stmt).fetchall()
+        _catalog, _catalog_version = [dict(row._mapping) for row in result], version
+    return [dict(config) for config in _catalog]
\ No newline at end of file
@@ -1,5 +1,7 @@
+import os
+
 from sqlalchemy import create_engine, MetaData
 
-DATABASE_URL = "sqlite:///data/series.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///data/series.db")
 engine = create_engine(DATABASE_URL)
 metadata = MetaData()
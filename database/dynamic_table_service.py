@@ -1,12 +1,29 @@
-from sqlalchemy import Table, Column, Integer, String, Float, Boolean, inspect
+from sqlalchemy import Table, Column, Integer, String, Float, Boolean, Index, select, func, bindparam
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.schema import MetaData
 from sqlalchemy.engine import Engine
 from database.database_config import metadata, engine
+from database import query_cache, columnar_store
+from database.table_catalog import get_table, register_table, get_columns_info, invalidate_table
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from services.validation_service import validate_and_suggest
+from services.validation_service import validate_and_suggest, validate_and_suggest_parallel, get_cached_models, fit_models, fit_shard_models, config_signature, rescore_entries, get_shard_key, MIN_SHARD_ROWS
+from database.series_stats_service import create_stats_table, ensure_stats_table, load_series_stats, rebuild_stats, apply_inserted_rows, load_data_version, load_shard_versions
+from database.online_state_service import load_online_states, rebuild_online_states, apply_online_updates, ensure_online_states
+from database.configuration_service import save_encoder
+from database.training_sample_service import ensure_training_sample, rebuild_training_sample, apply_sampled_rows, get_sample_table, SAMPLED_POLICIES
+from services.training_policy import get_training_policy, POLICY_ALL, POLICY_PERIODS
+from services.online_engine import get_engine, ENGINE_ONLINE
+from services.model_registry import clear_models
+from services.diagnostics import span, increment
+
+SQL_IN_CHUNK = 500
+RESCORE_CHUNK = 50000
+
+# Tabelas cujos índices de validação já foram verificados neste processo
+_indexed_tables = set()
 
 def create_dynamic_table(table_name: str, dataframe: pd.DataFrame):
     columns = [
@@ -27,49 +44,434 @@ def create_dynamic_table(table_name: str, dataframe: pd.DataFrame):
 
         columns.append(Column(col, column_type))
 
+    invalidate_table(table_name)
+    columnar_store.drop(table_name)
+    # Modelos salvos de uma tabela anterior com o mesmo nome não servem para a nova
+    clear_models(table_name)
     dynamic_table = Table(table_name, metadata, *columns)
     metadata.create_all(engine)
+    register_table(dynamic_table)
+    create_stats_table(table_name)
+    # Resultados em cache de uma tabela anterior com o mesmo nome deixam de valer
+    with engine.begin() as conn:
+        query_cache.bump_version(conn, table_name)
     return dynamic_table
 
-def load_data(table_name: str):
-    dynamic_table = Table(table_name, metadata, autoload_with=engine)
+def _sql_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+def build_filter_clauses(dynamic_table: Table, filters: dict):
+    clauses = []
+    for col, condition in (filters or {}).items():
+        if col not in dynamic_table.c:
+            continue
+        if isinstance(condition, tuple):
+            clauses.append(dynamic_table.c[col].between(_sql_value(condition[0]), _sql_value(condition[1])))
+        elif isinstance(condition, list):
+            if condition:
+                clauses.append(dynamic_table.c[col].in_([_sql_value(value) for value in condition]))
+    return clauses
+
+def load_data(table_name: str, filters: dict = None, columns: list = None, limit: int = None, offset: int = None):
+    cache_key = query_cache.make_key(table_name, query="load_data", filters=filters, columns=columns, limit=limit, offset=offset)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if columnar_store.enabled():
+        data = columnar_store.read(table_name, columns=columns, filters=filters, limit=limit, offset=offset)
+        query_cache.put(cache_key, data)
+        return data
+
+    dynamic_table = get_table(table_name)
+
+    if columns:
+        stmt = select(*[dynamic_table.c[col] for col in columns])
+    else:
+        stmt = dynamic_table.select()
+    stmt = stmt.where(*build_filter_clauses(dynamic_table, filters)).order_by(dynamic_table.c.id)
+    if limit is not None:
+        stmt = stmt.limit(limit).offset(offset or 0)
+
     try:
-        with engine.connect() as conn:
-            return pd.read_sql(dynamic_table.select(), conn)
+        with span("sqlite_read", table=table_name) as record, engine.connect() as conn:
+            data = pd.read_sql(stmt, conn)
+            record["rows"] = len(data)
+        increment("rows_scanned", len(data))
+        query_cache.put(cache_key, data)
+        return data
     except SQLAlchemyError as e:
         st.error(f"Erro ao buscar dados: {e}")
         return pd.DataFrame() 
 
-def save_data(table_name: str, dataframe: pd.DataFrame, config: dict):
-    validated_data = validate_data(dataframe, table_name, config)
-    dynamic_table = Table(table_name, metadata, autoload_with=engine)
+def count_rows(table_name: str, filters: dict = None):
+    cache_key = query_cache.make_key(table_name, query="count_rows", filters=filters)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    dynamic_table = get_table(table_name)
+    stmt = select(func.count()).select_from(dynamic_table).where(*build_filter_clauses(dynamic_table, filters))
     with engine.connect() as conn:
-        conn.execute(dynamic_table.insert(), validated_data.to_dict(orient="records"))
-        conn.commit()
+        total = conn.execute(stmt).scalar()
+    query_cache.put(cache_key, total)
+    return total
 
-def update_data(table_name: str, dataframe: pd.DataFrame, config: dict):
-    validated_data = validate_data(dataframe, table_name, config)
-    dynamic_table = Table(table_name, metadata, autoload_with=engine)
-    
+def load_filter_options(table_name: str, config: dict):
+    cache_key = query_cache.make_key(table_name, query="load_filter_options", analysis_variable=config["analysis_variable"])
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Intervalos das colunas numéricas e valores distintos das demais, calculados no banco
+    dynamic_table = get_table(table_name)
+    ignored_columns = ["id", "anomalia", "correcao_sugerida", config["analysis_variable"]]
+    columns = [column for column in dynamic_table.columns if column.name not in ignored_columns]
+
+    numeric_columns = [column for column in columns if isinstance(column.type, (Integer, Float))]
+    other_columns = [column for column in columns if column not in numeric_columns]
+
+    options = {}
     with engine.connect() as conn:
-        for _, row in validated_data.iterrows():
-            update_values = {col: row[col] for col in validated_data.columns if col != "id"}            
-            stmt = (
-                dynamic_table.update()
-                .where(dynamic_table.c.id == row["id"])  
-                .values(**update_values)  
-            )
-            conn.execute(stmt)
-        conn.commit()
-
-def validate_data(data: pd.DataFrame, table_name: str, config: dict):
+        if numeric_columns:
+            aggregates = []
+            for column in numeric_columns:
+                aggregates += [func.min(column), func.max(column)]
+            bounds = conn.execute(select(*aggregates)).one()
+            for position, column in enumerate(numeric_columns):
+                options[column.name] = {
+                    "integer": isinstance(column.type, Integer),
+                    "min": bounds[2 * position],
+                    "max": bounds[2 * position + 1],
+                }
+        for column in other_columns:
+            values = conn.execute(select(column).distinct().where(column.is_not(None)).order_by(column)).scalars().all()
+            options[column.name] = {"values": values}
+
+    options = {col: options[col] for col in [column.name for column in columns]}
+    query_cache.put(cache_key, options)
+    return options
+
+def save_data(table_name: str, dataframe: pd.DataFrame, config: dict, parallel: bool = False, before_commit=None, max_workers: int = None):
+    ensure_stats_table(table_name, config)
+    ensure_training_sample(table_name, config)
+    validated_data = validate_data(dataframe, table_name, config, parallel=parallel, max_workers=max_workers)
+    dynamic_table = get_table(table_name)
+    with span("sqlite_insert", table=table_name, rows=len(validated_data)), engine.begin() as conn:
+        # Os ids são atribuídos pelo SQLite; a inserção já reserva o banco para esta transação,
+        # então os ids do lote são consecutivos e terminam no maior id da tabela
+        validated_data = validated_data.drop(columns=["id"], errors="ignore")
+        if not validated_data.empty:
+            conn.execute(dynamic_table.insert(), validated_data.to_dict(orient="records"))
+            last_id = conn.execute(select(func.max(dynamic_table.c.id))).scalar()
+            validated_data.insert(0, "id", range(last_id - len(validated_data) + 1, last_id + 1))
+        else:
+            validated_data["id"] = pd.Series(dtype="int64")
+        apply_inserted_rows(conn, table_name, config, validated_data)
+        apply_sampled_rows(conn, table_name, config, validated_data)
+        if get_engine(config) == ENGINE_ONLINE:
+            apply_online_updates(conn, table_name, config, validated_data)
+        version = query_cache.bump_version(conn, table_name)
+        if before_commit:
+            before_commit(conn, validated_data)
+    increment("rows_inserted", len(validated_data))
+    if columnar_store.enabled():
+        columnar_store.append(table_name, validated_data, version)
+    return validated_data
+
+def load_current_values(table_name: str, ids, columns):
+    dynamic_table = get_table(table_name)
+    selected_columns = [dynamic_table.c.id] + [dynamic_table.c[col] for col in columns]
+    ids = list(ids)
+
+    frames = []
+    with span("sqlite_read_current_values", table=table_name, rows=len(ids)), engine.connect() as conn:
+        for start in range(0, len(ids), SQL_IN_CHUNK):
+            stmt = select(*selected_columns).where(dynamic_table.c.id.in_(ids[start:start + SQL_IN_CHUNK]))
+            frames.append(pd.read_sql(stmt, conn))
+    if not frames:
+        return pd.DataFrame(columns=["id"] + list(columns))
+    return pd.concat(frames, ignore_index=True)
+
+def update_data(table_name: str, dataframe: pd.DataFrame, config: dict):
+    if not isinstance(dataframe, pd.DataFrame):
+        dataframe = pd.DataFrame([dataframe])
+    if dataframe.empty:
+        return dataframe
+
+    ensure_stats_table(table_name, config)
+    ensure_training_sample(table_name, config)
+    dynamic_table = get_table(table_name)
+    analysis_variable = config["analysis_variable"]
+
+    # Apenas linhas cuja variável de análise mudou são revalidadas
+    shard_key = get_shard_key(config)
+    current_rows = load_current_values(table_name, dataframe["id"].tolist(), [analysis_variable] + ([shard_key] if shard_key else [])).set_index("id")
+    current_values = current_rows[analysis_variable]
+    new_values = pd.to_numeric(dataframe[analysis_variable], errors="coerce").to_numpy(dtype=float)
+    old_values = pd.to_numeric(current_values.reindex(dataframe["id"].to_numpy()), errors="coerce").to_numpy(dtype=float)
+    changed = ~((new_values == old_values) | (np.isnan(new_values) & np.isnan(old_values)))
+
+    validated_data = dataframe[~changed]
+    if changed.any():
+        revalidated = validate_data(dataframe[changed].copy(), table_name, config)
+        validated_data = pd.concat([revalidated, validated_data])
+
+    # Um único executemany com parâmetros vinculados, dentro de uma transação
+    stmt = dynamic_table.update().where(dynamic_table.c.id == bindparam("_id"))
+    records = validated_data.rename(columns={"id": "_id"}).to_dict(orient="records")
+    with span("sqlite_update", table=table_name, rows=len(records)), engine.begin() as conn:
+        conn.execute(stmt, records)
+        # Uma linha que mudou de grupo altera a versão do grupo antigo e do novo
+        shard_values = pd.concat([validated_data[shard_key], current_rows[shard_key]]) if shard_key in validated_data else None
+        rebuild_stats(conn, table_name, config, validated_data[config["series_column"]], shard_values)
+        rebuild_training_sample(conn, table_name, config, validated_data[config["series_column"]])
+        if get_engine(config) == ENGINE_ONLINE:
+            rebuild_online_states(conn, table_name, config, validated_data[config["series_column"]])
+        version = query_cache.bump_version(conn, table_name)
+    if columnar_store.enabled():
+        updated_rows = load_current_values(table_name, validated_data["id"].tolist(), [col.name for col in dynamic_table.columns if col.name != "id"])
+        columnar_store.apply_updates(table_name, updated_rows, version)
+    return validated_data
+
+def apply_edits(table_name: str, edits: dict, config: dict):
+    # edits: {id: {coluna: novo valor}}; apenas as linhas editadas são lidas, revalidadas e gravadas
+    if not edits:
+        return pd.DataFrame()
+
+    dynamic_table = get_table(table_name)
+    rows = load_current_values(table_name, [int(row_id) for row_id in edits], [col.name for col in dynamic_table.columns if col.name != "id"])
+    rows = rows.set_index("id")
+    for row_id, values in edits.items():
+        for col, value in values.items():
+            if col in rows.columns and int(row_id) in rows.index:
+                if pd.api.types.is_numeric_dtype(rows[col]):
+                    value = pd.to_numeric(value, errors="coerce")
+                rows.at[int(row_id), col] = value
+    return update_data(table_name, rows.reset_index(), config)
+
+def validate_data(data: pd.DataFrame, table_name: str, config: dict, parallel: bool = False, max_workers: int = None):
     if not isinstance(data, pd.DataFrame):
         data = pd.DataFrame([data])
 
-    existing_data = load_data(table_name)
-    validated_data = validate_and_suggest(existing_data, data, config)
+    series_stats = load_series_stats(table_name, config, data[config["series_column"]])
+
+    # O motor online lê apenas o estado das séries do lote, sem histórico nem modelos
+    if get_engine(config) == ENGINE_ONLINE:
+        online_states = load_online_states(table_name, config, data[config["series_column"]])
+        return validate_and_suggest(pd.DataFrame(), data, config, series_stats=series_stats, online_states=online_states)
+
+    # Com modelos em cache para a versão atual dos dados, o histórico só é necessário para retreino
+    version = load_data_version(table_name, config)
+    models = get_cached_models(config, version)
+    refit = config.get("validations", {}).get("refit_every") and not parallel
+    if models is None and tracks_shard_versions(config) and not refit:
+        models = fit_changed_shards(table_name, config, version)
+        existing_data = pd.DataFrame()
+    elif models is None or refit:
+        existing_data = load_validation_history(table_name, config)
+        if models is None:
+            models = fit_models(existing_data, config, version=version)
+            if models is not None and "encoder" in models and models["encoder"] != config.get("encoder") and config.get("nome_serie"):
+                config["encoder"] = models["encoder"]
+                save_encoder(config["nome_serie"], models["encoder"])
+    else:
+        existing_data = pd.DataFrame()
+
+    if parallel:
+        return validate_and_suggest_parallel(existing_data, data, config, series_stats=series_stats, models=models, max_workers=max_workers)
+
+    validated_data = validate_and_suggest(existing_data, data, config, series_stats=series_stats, models=models)
     return validated_data
 
+def tracks_shard_versions(config: dict):
+    # A versão de cada grupo descreve seu conjunto de treino apenas quando ele é todo o histórico
+    # aceito do grupo; janela, reservatório, períodos e limite geral já leem um conjunto limitado
+    training_policy = get_training_policy(config)
+    return bool(get_shard_key(config)) and training_policy["policy"] == POLICY_ALL and not training_policy["max_rows"]
+
+def fit_changed_shards(table_name: str, config: dict, version):
+    # Cada grupo tem sua versão na tabela de estatísticas por grupo: apenas o histórico
+    # dos grupos que mudaram desde o último treino é lido e retreinado
+    shard_versions = load_shard_versions(table_name, config)
+    changed = [
+        label for label, shard_version in shard_versions.items()
+        if shard_version[0] >= MIN_SHARD_ROWS and get_cached_models(config, shard_version, shard=label) is None
+    ]
+    history = load_validation_history(table_name, config, shards=changed) if changed else pd.DataFrame()
+    return fit_shard_models(history, config, version, shard_versions)
+
+def rescore_series(table_name: str, config: dict, progress_callback=None):
+    # Recalcula anomalia e correcao_sugerida de todas as linhas com a configuração atual:
+    # um único treino, uma única pontuação e gravação apenas das linhas que mudaram
+    ensure_stats_table(table_name, config)
+    ensure_training_sample(table_name, config)
+    if get_engine(config) == ENGINE_ONLINE:
+        ensure_online_states(table_name, config)
+    dynamic_table = get_table(table_name)
+
+    columns = ["id", "anomalia", "correcao_sugerida", config["series_column"], config["analysis_variable"]]
+    columns += [col for col in (config.get("auxiliary_variables") or []) + [get_shard_key(config)] if col and col not in columns and col in dynamic_table.c]
+    data = load_data(table_name, columns=columns)
+    if data.empty:
+        return 0, 0
+
+    models = None
+    if get_engine(config) != ENGINE_ONLINE:
+        version = load_data_version(table_name, config)
+        models = get_cached_models(config, version)
+        if models is None and tracks_shard_versions(config):
+            models = fit_changed_shards(table_name, config, version)
+        elif models is None:
+            models = fit_models(load_validation_history(table_name, config), config, version=version)
+
+    with span("rescore", table=table_name, rows=len(data)):
+        anomalias, correcao_sugerida = rescore_entries(data, config, models)
+
+    old_corrections = pd.to_numeric(data["correcao_sugerida"], errors="coerce").to_numpy(dtype=float)
+    new_corrections = pd.to_numeric(pd.Series(correcao_sugerida), errors="coerce").to_numpy(dtype=float)
+    changed = (data["anomalia"].astype(bool).to_numpy() != anomalias) | ~(
+        (old_corrections == new_corrections) | (np.isnan(old_corrections) & np.isnan(new_corrections))
+    )
+    updates = pd.DataFrame({"_id": data["id"].to_numpy()[changed], "anomalia": anomalias[changed], "correcao_sugerida": correcao_sugerida[changed]})
+    updates["correcao_sugerida"] = updates["correcao_sugerida"].astype(object).where(updates["correcao_sugerida"].notna(), None)
+
+    # Blocos em transações próprias para o progresso ficar visível; as tabelas derivadas
+    # são reconstruídas no final mesmo se a operação for interrompida
+    stmt = dynamic_table.update().where(dynamic_table.c.id == bindparam("_id"))
+    try:
+        for start in range(0, len(updates), RESCORE_CHUNK):
+            records = updates.iloc[start:start + RESCORE_CHUNK].to_dict(orient="records")
+            with span("sqlite_update", table=table_name, rows=len(records)), engine.begin() as conn:
+                conn.execute(stmt, records)
+                if progress_callback:
+                    progress_callback(conn, start + len(records), len(updates))
+    finally:
+        with engine.begin() as conn:
+            rebuild_stats(conn, table_name, config)
+            rebuild_training_sample(conn, table_name, config)
+            if get_engine(config) == ENGINE_ONLINE:
+                rebuild_online_states(conn, table_name, config)
+            query_cache.bump_version(conn, table_name)
+        columnar_store.drop(table_name)
+
+    return len(updates), int(anomalias.sum())
+
+def ensure_indexes(table_name: str, config: dict):
+    if table_name in _indexed_tables:
+        return
+
+    dynamic_table = get_table(table_name)
+    index_name = f"ix_{table_name}_validacao"
+    if index_name not in {index.name for index in dynamic_table.indexes}:
+        index = Index(index_name, dynamic_table.c.anomalia, dynamic_table.c[config["series_column"]], dynamic_table.c.id)
+        index.create(engine, checkfirst=True)
+    _indexed_tables.add(table_name)
+
+def _shard_values(column, labels):
+    # Os rótulos dos grupos são textos (series_key); colunas numéricas são comparadas pelo número
+    if isinstance(column.type, Boolean):
+        return [label == "True" for label in labels]
+    if isinstance(column.type, (Integer, Float)):
+        return [float(label) for label in labels]
+    return list(labels)
+
+def load_validation_history(table_name: str, config: dict, shards: list = None):
+    # Apenas as colunas usadas na validação, das linhas não anômalas, limitadas
+    # conforme a política de treino da configuração (services/training_policy.py).
+    # Com shards, apenas as linhas desses grupos do modelo (usado com todo o histórico, ver tracks_shard_versions)
+    ensure_indexes(table_name, config)
+    ensure_training_sample(table_name, config)
+    training_policy = get_training_policy(config)
+
+    cache_key = query_cache.make_key(
+        table_name, query="load_validation_history", config=config_signature(config), shards=None if shards is None else sorted(shards)
+    )
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    dynamic_table = get_table(table_name)
+    columns = ["id", "anomalia", config["series_column"], config["analysis_variable"]]
+    for col in (config.get("auxiliary_variables") or []) + [get_shard_key(config)]:
+        if col and col not in columns and col in dynamic_table.c:
+            columns.append(col)
+    shard_values = None if shards is None else _shard_values(dynamic_table.c[get_shard_key(config)], shards)
+
+    if columnar_store.enabled():
+        data = _load_columnar_history(table_name, config, columns, training_policy, shard_values)
+        query_cache.put(cache_key, data)
+        return data
+
+    series_column = dynamic_table.c[config["series_column"]]
+    selected_columns = [dynamic_table.c[col] for col in columns]
+    accepted = dynamic_table.c.anomalia == False
+
+    if training_policy["policy"] == POLICY_PERIODS:
+        periods = select(series_column).where(accepted).distinct().order_by(series_column.desc()).limit(training_policy["periods"])
+        stmt = select(*selected_columns).where(accepted, series_column.in_(periods.scalar_subquery()))
+    elif training_policy["policy"] in SAMPLED_POLICIES:
+        # Janela e reservatório são mantidos a cada escrita e só guardam linhas aceitas: a leitura
+        # percorre a amostra e busca cada linha pela chave primária, sem varrer o histórico
+        sample_table = get_sample_table(table_name)
+        stmt = select(*selected_columns).where(dynamic_table.c.id.in_(select(sample_table.c.row_id)))
+    else:
+        stmt = select(*selected_columns).where(accepted)
+
+    if shard_values is not None:
+        stmt = stmt.where(dynamic_table.c[get_shard_key(config)].in_(shard_values))
+
+    # O limite geral mantém as linhas mais recentes do conjunto escolhido
+    if training_policy["max_rows"]:
+        capped = stmt.order_by(None).order_by(stmt.selected_columns.id.desc()).limit(training_policy["max_rows"]).subquery()
+        stmt = select(*[capped.c[col] for col in columns]).order_by(capped.c.id)
+    else:
+        stmt = stmt.order_by(stmt.selected_columns.id)
+
+    with span("sqlite_read_validation", table=table_name) as record, engine.connect() as conn:
+        data = pd.read_sql(stmt, conn)
+        record["rows"] = len(data)
+    increment("rows_scanned", len(data))
+    query_cache.put(cache_key, data)
+    return data
+
+def _load_columnar_history(table_name: str, config: dict, columns: list, training_policy: dict, shard_values: list = None):
+    import pyarrow.dataset as ds
+
+    accepted = ds.field("anomalia") == False
+    if training_policy["policy"] in SAMPLED_POLICIES:
+        sample_table = get_sample_table(table_name)
+        with engine.connect() as conn:
+            row_ids = conn.execute(select(sample_table.c.row_id)).scalars().all()
+        accepted = accepted & ds.field("id").isin(row_ids)
+
+    if shard_values is not None:
+        accepted = accepted & ds.field(get_shard_key(config)).isin(shard_values)
+
+    data = columnar_store.read(table_name, columns=columns, where=accepted)
+    if training_policy["policy"] == POLICY_PERIODS:
+        periods = pd.Series(data[config["series_column"]].dropna().unique()).sort_values(ascending=False).head(training_policy["periods"])
+        data = data[data[config["series_column"]].isin(periods)]
+    if training_policy["max_rows"]:
+        data = data.tail(training_policy["max_rows"])
+    return data.reset_index(drop=True)
+
+def warm_up_models(config: dict):
+    if get_engine(config) == ENGINE_ONLINE:
+        return False
+    table_name = config["dynamic_table_name"]
+    return get_cached_models(config, load_data_version(table_name, config)) is not None
+
 def load_columns_info(table_name: str):
-    inspector = inspect(engine)
-    return inspector.get_columns(table_name)
\ No newline at end of file
+    return get_columns_info(table_name)
+
+def import_data(table_name: str, chunks, config: dict, parallel: bool = False, progress_callback=None, max_workers: int = None):
+    # Cada bloco é validado e inserido em sua própria transação
+    total_rows, total_anomalies = 0, 0
+    for chunk in chunks:
+        validated_data = save_data(table_name, chunk, config, parallel=parallel, max_workers=max_workers)
+        total_rows += len(validated_data)
+        total_anomalies += int(validated_data["anomalia"].sum())
+        if progress_callback:
+            progress_callback(total_rows)
+    return total_rows, total_anomalies
@@ -0,0 +1,185 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Table, Column, Integer, String, JSON, Boolean, DateTime, insert, select, inspect, text, or_
+from database.database_config import metadata, engine
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+jobs_table = Table(
+    "jobs",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("kind", String, nullable=False),
+    Column("nome_serie", String, nullable=False),
+    Column("status", String, nullable=False, default=JOB_QUEUED),
+    Column("params", JSON, nullable=True),
+    Column("total_rows", Integer, nullable=True),
+    Column("processed_rows", Integer, nullable=False, default=0),
+    Column("anomalies", Integer, nullable=False, default=0),
+    # Último bloco gravado com sucesso; a retomada continua a partir dele
+    Column("checkpoint", Integer, nullable=False, default=0),
+    Column("cancel_requested", Boolean, nullable=False, default=False),
+    Column("message", String, nullable=True),
+    # Processo que executa o job e último sinal de vida dele; vários processos usam o mesmo banco
+    Column("owner", String, nullable=True),
+    Column("heartbeat_at", DateTime, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+# A tabela é criada no primeiro uso, não ao importar o módulo
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            metadata.create_all(engine, tables=[jobs_table])
+            migrate_jobs_table()
+            _schema_ready = True
+
+
+def migrate_jobs_table():
+    # Bancos criados antes do controle de execução recebem as colunas sem perder os jobs
+    columns = {column["name"] for column in inspect(engine).get_columns("jobs")}
+    with engine.begin() as conn:
+        if "owner" not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN owner VARCHAR"))
+        if "heartbeat_at" not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN heartbeat_at DATETIME"))
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def create_job(kind: str, nome_serie: str, params: dict = None, total_rows: int = None):
+    ensure_schema()
+    with engine.begin() as conn:
+        result = conn.execute(
+            insert(jobs_table).values(
+                kind=kind,
+                nome_serie=nome_serie,
+                status=JOB_QUEUED,
+                params=params or {},
+                total_rows=total_rows,
+                created_at=_now(),
+                updated_at=_now(),
+            )
+        )
+        return result.inserted_primary_key[0]
+
+
+def get_job(job_id: int):
+    ensure_schema()
+    with engine.connect() as conn:
+        row = conn.execute(select(jobs_table).where(jobs_table.c.id == job_id)).first()
+    return dict(row._mapping) if row else None
+
+
+def list_jobs(nome_serie: str = None, statuses=None, limit: int = 20):
+    ensure_schema()
+    stmt = select(jobs_table).order_by(jobs_table.c.id.desc()).limit(limit)
+    if nome_serie is not None:
+        stmt = stmt.where(jobs_table.c.nome_serie == nome_serie)
+    if statuses is not None:
+        stmt = stmt.where(jobs_table.c.status.in_(list(statuses)))
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(stmt)]
+
+
+def claim_job(job_id: int, owner: str):
+    # Só um executor consegue passar o job de "queued" para "running"
+    ensure_schema()
+    with engine.begin() as conn:
+        result = conn.execute(
+            jobs_table.update()
+            .where(jobs_table.c.id == job_id, jobs_table.c.status == JOB_QUEUED)
+            .values(status=JOB_RUNNING, owner=owner, heartbeat_at=_now(), updated_at=_now())
+        )
+    return result.rowcount == 1
+
+
+def heartbeat(owner: str):
+    ensure_schema()
+    with engine.begin() as conn:
+        conn.execute(
+            jobs_table.update()
+            .where(jobs_table.c.owner == owner, jobs_table.c.status == JOB_RUNNING)
+            .values(heartbeat_at=_now())
+        )
+
+
+def save_checkpoint(conn, job_id: int, checkpoint: int, processed_rows: int, anomalies: int, total_rows: int = None):
+    # Executado dentro da transação que grava o bloco, para a retomada não duplicar linhas
+    values = {"checkpoint": checkpoint, "processed_rows": processed_rows, "anomalies": anomalies, "heartbeat_at": _now(), "updated_at": _now()}
+    if total_rows is not None:
+        values["total_rows"] = total_rows
+    conn.execute(jobs_table.update().where(jobs_table.c.id == job_id).values(**values))
+
+
+def set_progress(job_id: int, processed_rows: int, anomalies: int, total_rows: int = None):
+    with engine.begin() as conn:
+        save_checkpoint(conn, job_id, 0, processed_rows, anomalies, total_rows)
+
+
+def finish_job(job_id: int, status: str, message: str = None):
+    ensure_schema()
+    with engine.begin() as conn:
+        conn.execute(jobs_table.update().where(jobs_table.c.id == job_id).values(status=status, message=message, updated_at=_now()))
+
+
+def request_cancel(job_id: int):
+    ensure_schema()
+    with engine.begin() as conn:
+        conn.execute(
+            jobs_table.update()
+            .where(jobs_table.c.id == job_id, jobs_table.c.status.in_(ACTIVE_STATUSES))
+            .values(cancel_requested=True, updated_at=_now())
+        )
+
+
+def is_cancel_requested(job_id: int, conn=None):
+    # Dentro de uma transação de escrita a consulta usa a mesma conexão (o SQLite bloquearia outra)
+    ensure_schema()
+    stmt = select(jobs_table.c.cancel_requested).where(jobs_table.c.id == job_id)
+    if conn is not None:
+        return bool(conn.execute(stmt).scalar())
+    with engine.connect() as conn:
+        return bool(conn.execute(stmt).scalar())
+
+
+def requeue_stale_jobs(stale_seconds: int):
+    # Jobs em execução cujo processo parou de enviar sinais de vida voltam para a fila;
+    # jobs de outros processos ainda ativos não são tocados
+    ensure_schema()
+    stale = (
+        jobs_table.c.status == JOB_RUNNING,
+        or_(jobs_table.c.heartbeat_at.is_(None), jobs_table.c.heartbeat_at < _now() - timedelta(seconds=stale_seconds)),
+    )
+    with engine.begin() as conn:
+        job_ids = [row.id for row in conn.execute(select(jobs_table.c.id).where(*stale).order_by(jobs_table.c.id))]
+        if job_ids:
+            conn.execute(
+                jobs_table.update()
+                .where(jobs_table.c.id.in_(job_ids), *stale)
+                .values(status=JOB_QUEUED, owner=None, updated_at=_now())
+            )
+    return job_ids
+
+
+def requeue_interrupted_jobs(stale_seconds: int):
+    # Na abertura do processo: jobs interrompidos voltam para a fila e todos os jobs da fila são retomados
+    requeue_stale_jobs(stale_seconds)
+    with engine.connect() as conn:
+        return [row.id for row in conn.execute(select(jobs_table.c.id).where(jobs_table.c.status == JOB_QUEUED).order_by(jobs_table.c.id))]
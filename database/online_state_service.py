@@ -0,0 +1,123 @@
+from sqlalchemy import Table, Column, Integer, String, Float, select, inspect
+from database.database_config import metadata, engine
+from database.table_catalog import get_table
+import pandas as pd
+
+from services.online_engine import get_parameters, update, get_engine, ENGINE_ONLINE
+from services.validation_service import series_key
+
+# Tabelas de estado do motor online já verificadas neste processo
+_ready_tables = set()
+
+
+def online_table_name(table_name: str):
+    return f"{table_name}_online"
+
+
+def get_online_table(table_name: str):
+    name = online_table_name(table_name)
+    if name in metadata.tables:
+        return metadata.tables[name]
+
+    return Table(
+        name,
+        metadata,
+        Column("series_key", String, primary_key=True),
+        Column("value_count", Integer, nullable=False, default=0),
+        Column("ewma_mean", Float, nullable=False, default=0.0),
+        Column("ewma_var", Float, nullable=False, default=0.0),
+    )
+
+
+def refresh_online_states(conn, table_name: str, config: dict):
+    # Só o motor online usa os estados; com outro motor a tabela é recalculada ao voltar para ele
+    if get_engine(config) != ENGINE_ONLINE:
+        return
+    get_online_table(table_name).create(conn, checkfirst=True)
+    rebuild_online_states(conn, table_name, config)
+
+
+def ensure_online_states(table_name: str, config: dict):
+    if table_name in _ready_tables:
+        return
+
+    if not inspect(engine).has_table(online_table_name(table_name)):
+        get_online_table(table_name).create(engine)
+        with engine.begin() as conn:
+            rebuild_online_states(conn, table_name, config)
+
+    _ready_tables.add(table_name)
+
+
+def _read_states(conn, online_table, keys):
+    stmt = select(online_table).where(online_table.c.series_key.in_(keys))
+    return {
+        row.series_key: {"count": row.value_count, "mean": row.ewma_mean, "var": row.ewma_var}
+        for row in conn.execute(stmt)
+    }
+
+
+def _write_states(conn, online_table, states: dict, keys=None):
+    if keys is None:
+        conn.execute(online_table.delete())
+    else:
+        conn.execute(online_table.delete().where(online_table.c.series_key.in_(keys)))
+
+    if states:
+        conn.execute(
+            online_table.insert(),
+            [
+                {"series_key": key, "value_count": state["count"], "ewma_mean": state["mean"], "ewma_var": state["var"]}
+                for key, state in states.items()
+            ],
+        )
+
+
+def _replay(states: dict, accepted: pd.DataFrame, config: dict):
+    alpha, z_threshold = get_parameters(config)
+    keys = accepted[config["series_column"]].map(series_key).to_numpy()
+    values = pd.to_numeric(accepted[config["analysis_variable"]], errors="coerce").to_numpy(dtype=float)
+    for key, value in zip(keys, values):
+        if key is not None:
+            states[key] = update(states.get(key), value, alpha, z_threshold)
+    return states
+
+
+def load_online_states(table_name: str, config: dict, series_values):
+    keys = {series_key(value) for value in series_values} - {None}
+    if not keys:
+        return {}
+
+    ensure_online_states(table_name, config)
+    with engine.connect() as conn:
+        return _read_states(conn, get_online_table(table_name), list(keys))
+
+
+def rebuild_online_states(conn, table_name: str, config: dict, series_values=None):
+    dynamic_table = get_table(table_name)
+    series_column = dynamic_table.c[config["series_column"]]
+
+    stmt = (
+        select(dynamic_table.c.id, series_column, dynamic_table.c[config["analysis_variable"]])
+        .where(dynamic_table.c.anomalia == False)
+        .order_by(dynamic_table.c.id)
+    )
+    keys = None
+    if series_values is not None:
+        series_values = pd.Series(list(series_values)).dropna().unique().tolist()
+        stmt = stmt.where(series_column.in_(series_values))
+        keys = list({series_key(value) for value in series_values} - {None})
+
+    accepted = pd.read_sql(stmt, conn)
+    _write_states(conn, get_online_table(table_name), _replay({}, accepted, config), keys)
+
+
+def apply_online_updates(conn, table_name: str, config: dict, inserted_data: pd.DataFrame):
+    accepted = inserted_data[inserted_data["anomalia"] == False].sort_values("id")
+    keys = list(set(accepted[config["series_column"]].map(series_key).dropna()))
+    if not keys:
+        return
+
+    online_table = get_online_table(table_name)
+    states = _replay(_read_states(conn, online_table, keys), accepted, config)
+    _write_states(conn, online_table, states, keys)
@@ -0,0 +1,88 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from database.table_version_service import get_write_version, bump_write_version
+
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Cache compartilhado entre sessões. Os DataFrames retornados são a mesma
+# instância para todos os leitores e não devem ser alterados no lugar.
+# As chaves usam a versão de escrita gravada no banco, não um contador do processo.
+_lock = threading.Lock()
+_entries = OrderedDict()
+_entry_sizes = {}
+_total_bytes = 0
+
+
+def get_version(table_name: str):
+    return get_write_version(table_name)
+
+
+def _remove(key):
+    global _total_bytes
+    _entries.pop(key, None)
+    _total_bytes -= _entry_sizes.pop(key, 0)
+
+
+def bump_version(conn, table_name: str):
+    # Chamado dentro da transação da escrita: quem vê a versão nova também vê os dados
+    version = bump_write_version(conn, table_name)
+    with _lock:
+        for key in [key for key in _entries if key[0] == table_name]:
+            _remove(key)
+    return version
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_freeze(item) for item in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def make_key(table_name: str, **params):
+    return (table_name, get_version(table_name), _freeze(params))
+
+
+def get(key):
+    with _lock:
+        if key not in _entries:
+            return None
+        _entries.move_to_end(key)
+        return _entries[key]
+
+
+def put(key, value):
+    global _total_bytes
+    if hasattr(value, "memory_usage"):
+        size = int(value.memory_usage(deep=True).sum())
+    else:
+        size = sys.getsizeof(value)
+    if size > MAX_CACHE_BYTES:
+        return
+
+    # Um resultado calculado antes de uma escrita não é mais válido
+    if key[1] != get_version(key[0]):
+        return
+
+    with _lock:
+        _remove(key)
+        _entries[key] = value
+        _entry_sizes[key] = size
+        _total_bytes += size
+        while _total_bytes > MAX_CACHE_BYTES:
+            _remove(next(iter(_entries)))
+
+
+def clear():
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _entry_sizes.clear()
+        _total_bytes = 0
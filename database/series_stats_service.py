@@ -0,0 +1,217 @@
+from sqlalchemy import Table, Column, Integer, String, Float, select, func, inspect
+from database.database_config import metadata, engine
+from database.table_catalog import get_table
+import pandas as pd
+
+from services.validation_service import series_key, get_shard_key
+
+# Tabelas de estatísticas já verificadas neste processo, com a coluna de grupo da configuração
+_ready_tables = set()
+
+
+def stats_table_name(table_name: str):
+    return f"{table_name}_stats"
+
+
+def shard_stats_table_name(table_name: str):
+    return f"{table_name}_shard_stats"
+
+
+def get_stats_table(table_name: str, shards: bool = False):
+    # Com modelos por grupo, uma segunda tabela guarda as mesmas estatísticas por valor da
+    # coluna do grupo; cada linha é a versão dos dados daquele grupo
+    name = shard_stats_table_name(table_name) if shards else stats_table_name(table_name)
+    if name in metadata.tables:
+        return metadata.tables[name]
+
+    return Table(
+        name,
+        metadata,
+        Column("series_key", String, primary_key=True),
+        Column("value_count", Integer, nullable=False, default=0),
+        Column("value_sum", Float, nullable=False, default=0.0),
+        Column("last_id", Integer, nullable=True),
+        Column("last_value", Float, nullable=True),
+    )
+
+
+def create_stats_table(table_name: str):
+    get_stats_table(table_name).create(engine, checkfirst=True)
+    _ready_tables.add((table_name, None))
+
+
+def refresh_stats_table(conn, table_name: str, config: dict):
+    # Recalculada no lugar: outros processos continuam vendo a tabela que já verificaram
+    get_stats_table(table_name).create(conn, checkfirst=True)
+    if get_shard_key(config):
+        get_stats_table(table_name, shards=True).create(conn, checkfirst=True)
+    rebuild_stats(conn, table_name, config)
+
+
+def ensure_stats_table(table_name: str, config: dict):
+    shard_key = get_shard_key(config)
+    if (table_name, shard_key) in _ready_tables:
+        return
+
+    if not inspect(engine).has_table(stats_table_name(table_name)):
+        get_stats_table(table_name).create(engine)
+        with engine.begin() as conn:
+            _rebuild_grouped(conn, table_name, config, config["series_column"], get_stats_table(table_name))
+
+    if shard_key and not inspect(engine).has_table(shard_stats_table_name(table_name)):
+        get_stats_table(table_name, shards=True).create(engine)
+        with engine.begin() as conn:
+            _rebuild_grouped(conn, table_name, config, shard_key, get_stats_table(table_name, shards=True))
+
+    _ready_tables.add((table_name, shard_key))
+
+
+def _stats_records(stats: dict):
+    return [
+        {
+            "series_key": key,
+            "value_count": values["count"],
+            "value_sum": values["sum"],
+            "last_id": values["last_id"],
+            "last_value": None if pd.isna(values["last_value"]) else values["last_value"],
+        }
+        for key, values in stats.items()
+    ]
+
+
+def _read_stats(conn, stats_table, keys):
+    stmt = select(stats_table).where(stats_table.c.series_key.in_(keys))
+    return {
+        row.series_key: {
+            "count": row.value_count,
+            "sum": row.value_sum,
+            "last_id": row.last_id,
+            "last_value": row.last_value,
+        }
+        for row in conn.execute(stmt)
+    }
+
+
+def _write_stats(conn, stats_table, stats: dict, keys):
+    conn.execute(stats_table.delete().where(stats_table.c.series_key.in_(keys)))
+    if stats:
+        conn.execute(stats_table.insert(), _stats_records(stats))
+
+
+def load_series_stats(table_name: str, config: dict, series_values):
+    keys = {series_key(value) for value in series_values} - {None}
+    if not keys:
+        return {}
+
+    ensure_stats_table(table_name, config)
+    with engine.connect() as conn:
+        return _read_stats(conn, get_stats_table(table_name), list(keys))
+
+
+def rebuild_stats(conn, table_name: str, config: dict, series_values=None, shard_values=None):
+    _rebuild_grouped(conn, table_name, config, config["series_column"], get_stats_table(table_name), series_values)
+    if get_shard_key(config):
+        _rebuild_grouped(conn, table_name, config, get_shard_key(config), get_stats_table(table_name, shards=True), shard_values)
+
+
+def _rebuild_grouped(conn, table_name: str, config: dict, group_column: str, stats_table, series_values=None):
+    dynamic_table = get_table(table_name)
+    series_column = dynamic_table.c[group_column]
+    analysis_variable = dynamic_table.c[config["analysis_variable"]]
+
+    aggregate = (
+        select(
+            series_column.label("series"),
+            func.count(analysis_variable).label("value_count"),
+            func.total(analysis_variable).label("value_sum"),
+            func.max(dynamic_table.c.id).label("last_id"),
+        )
+        .where(dynamic_table.c.anomalia == False)
+        .group_by(series_column)
+    )
+    if series_values is not None:
+        series_values = pd.Series(list(series_values)).dropna().unique().tolist()
+        aggregate = aggregate.where(series_column.in_(series_values))
+    aggregate = aggregate.subquery()
+
+    stmt = select(aggregate, analysis_variable.label("last_value")).join(
+        dynamic_table, dynamic_table.c.id == aggregate.c.last_id
+    )
+
+    stats = {}
+    for row in conn.execute(stmt):
+        key = series_key(row.series)
+        if key is not None:
+            stats[key] = {"count": row.value_count, "sum": row.value_sum, "last_id": row.last_id, "last_value": row.last_value}
+
+    if series_values is None:
+        conn.execute(stats_table.delete())
+        if stats:
+            conn.execute(stats_table.insert(), _stats_records(stats))
+    else:
+        keys = list({series_key(value) for value in series_values} - {None})
+        _write_stats(conn, stats_table, stats, keys)
+
+
+def apply_inserted_rows(conn, table_name: str, config: dict, inserted_data: pd.DataFrame):
+    _apply_grouped(conn, get_stats_table(table_name), config, config["series_column"], inserted_data)
+    if get_shard_key(config):
+        _apply_grouped(conn, get_stats_table(table_name, shards=True), config, get_shard_key(config), inserted_data)
+
+
+def _apply_grouped(conn, stats_table, config: dict, series_column: str, inserted_data: pd.DataFrame):
+    analysis_variable = config["analysis_variable"]
+
+    accepted = inserted_data[inserted_data["anomalia"] == False]
+    if accepted.empty:
+        return
+
+    accepted = accepted.sort_values("id")
+    keys = accepted[series_column].map(series_key)
+    accepted = accepted[keys.notna()]
+    keys = keys[keys.notna()]
+    if accepted.empty:
+        return
+
+    grouped = accepted.groupby(keys)
+    counts = grouped[analysis_variable].count()
+    sums = grouped[analysis_variable].sum()
+    last_rows = grouped.tail(1)
+    last_rows = last_rows.set_index(keys[last_rows.index])
+
+    stats = _read_stats(conn, stats_table, list(counts.index))
+    for key in counts.index:
+        current = stats.setdefault(key, {"count": 0, "sum": 0.0, "last_id": None, "last_value": None})
+        current["count"] += int(counts[key])
+        current["sum"] += float(sums[key])
+        current["last_id"] = int(last_rows.at[key, "id"])
+        current["last_value"] = float(last_rows.at[key, analysis_variable])
+
+    _write_stats(conn, stats_table, stats, list(counts.index))
+
+
+def load_data_version(table_name: str, config: dict):
+    ensure_stats_table(table_name, config)
+    stats_table = get_stats_table(table_name)
+    stmt = select(
+        func.total(stats_table.c.value_count),
+        func.max(stats_table.c.last_id),
+        func.total(stats_table.c.value_sum),
+    )
+    with engine.connect() as conn:
+        count, last_id, total = conn.execute(stmt).one()
+
+    if not count and last_id is None:
+        return (0, None, 0.0)
+    return (int(count), last_id, round(float(total), 4))
+
+
+def load_shard_versions(table_name: str, config: dict):
+    # Versão dos dados de cada grupo, no mesmo formato de load_data_version
+    ensure_stats_table(table_name, config)
+    with engine.connect() as conn:
+        rows = conn.execute(select(get_stats_table(table_name, shards=True))).all()
+    return {
+        row.series_key: (int(row.value_count), row.last_id, round(float(row.value_sum), 4))
+        for row in rows
+    }
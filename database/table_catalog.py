@@ -0,0 +1,43 @@
+import threading
+
+from sqlalchemy import Table, inspect
+from database.database_config import metadata, engine
+
+# Tabelas refletidas e colunas de cada tabela dinâmica, mantidas em memória
+# até que a tabela seja recriada
+_lock = threading.Lock()
+_tables = {}
+_columns_info = {}
+
+
+def get_table(table_name: str):
+    table = _tables.get(table_name)
+    if table is None:
+        with _lock:
+            table = _tables.get(table_name)
+            if table is None:
+                table = Table(table_name, metadata, autoload_with=engine)
+                _tables[table_name] = table
+    return table
+
+
+def register_table(table: Table):
+    with _lock:
+        _tables[table.name] = table
+        _columns_info.pop(table.name, None)
+
+
+def get_columns_info(table_name: str):
+    columns_info = _columns_info.get(table_name)
+    if columns_info is None:
+        columns_info = inspect(engine).get_columns(table_name)
+        _columns_info[table_name] = columns_info
+    return columns_info
+
+
+def invalidate_table(table_name: str):
+    with _lock:
+        _tables.pop(table_name, None)
+        _columns_info.pop(table_name, None)
+        if table_name in metadata.tables:
+            metadata.remove(metadata.tables[table_name])
@@ -0,0 +1,46 @@
+import threading
+
+from sqlalchemy import Table, Column, Integer, String, insert, select
+from database.database_config import metadata, engine
+
+# Versão de escrita de cada tabela de série, incrementada na mesma transação de cada escrita.
+# Fica no banco para que escritas de outros processos (cli.py, api.py) também sejam vistas.
+table_versions = Table(
+    "table_versions",
+    metadata,
+    Column("table_name", String, primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+)
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            metadata.create_all(engine, tables=[table_versions])
+            _schema_ready = True
+
+
+def get_write_version(table_name: str):
+    ensure_schema()
+    with engine.connect() as conn:
+        return conn.execute(select(table_versions.c.version).where(table_versions.c.table_name == table_name)).scalar() or 0
+
+
+def bump_write_version(conn, table_name: str):
+    # Dentro da transação de escrita outra conexão ficaria bloqueada; a tabela é criada pela mesma
+    if not _schema_ready:
+        table_versions.create(conn, checkfirst=True)
+    result = conn.execute(
+        table_versions.update()
+        .where(table_versions.c.table_name == table_name)
+        .values(version=table_versions.c.version + 1)
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(table_versions).values(table_name=table_name, version=1))
+    return conn.execute(select(table_versions.c.version).where(table_versions.c.table_name == table_name)).scalar()
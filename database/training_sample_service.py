@@ -0,0 +1,149 @@
+from sqlalchemy import Table, Column, Integer, String, select, inspect
+from database.database_config import metadata, engine
+from database.table_catalog import get_table
+import pandas as pd
+
+from services.training_policy import get_training_policy, reservoir_slot, POLICY_WINDOW, POLICY_RESERVOIR
+from services.validation_service import series_key
+
+# Políticas mantidas incrementalmente na tabela de amostra: a janela é um anel com os
+# últimos registros aceitos de cada série e o reservatório, uma amostra uniforme
+SAMPLED_POLICIES = (POLICY_WINDOW, POLICY_RESERVOIR)
+
+# Tabelas de amostra de treino já verificadas neste processo, com a política que as montou
+_ready_tables = {}
+
+
+def sample_table_name(table_name: str):
+    return f"{table_name}_sample"
+
+
+def get_sample_table(table_name: str):
+    name = sample_table_name(table_name)
+    if name in metadata.tables:
+        return metadata.tables[name]
+
+    # "seen" é o total de linhas aceitas da série já oferecidas à janela ou ao reservatório
+    return Table(
+        name,
+        metadata,
+        Column("series_key", String, primary_key=True),
+        Column("slot", Integer, primary_key=True),
+        Column("row_id", Integer, nullable=False, index=True),
+        Column("seen", Integer, nullable=False),
+    )
+
+
+def _sample_signature(training_policy: dict):
+    return training_policy["policy"], training_policy["window"], training_policy["reservoir_size"]
+
+
+def refresh_training_sample(conn, table_name: str, config: dict):
+    training_policy = get_training_policy(config)
+    if training_policy["policy"] not in SAMPLED_POLICIES:
+        return
+    get_sample_table(table_name).create(conn, checkfirst=True)
+    rebuild_training_sample(conn, table_name, config)
+    _ready_tables[table_name] = _sample_signature(training_policy)
+
+
+def ensure_training_sample(table_name: str, config: dict):
+    training_policy = get_training_policy(config)
+    if training_policy["policy"] not in SAMPLED_POLICIES:
+        return
+    signature = _sample_signature(training_policy)
+    if _ready_tables.get(table_name) == signature:
+        return
+
+    # Tabela nova, ou montada neste processo com outra janela ou outro tamanho de reservatório
+    if not inspect(engine).has_table(sample_table_name(table_name)) or table_name in _ready_tables:
+        get_sample_table(table_name).create(engine, checkfirst=True)
+        with engine.begin() as conn:
+            rebuild_training_sample(conn, table_name, config)
+
+    _ready_tables[table_name] = signature
+
+
+def _read_samples(conn, sample_table, keys):
+    samples = {}
+    for row in conn.execute(select(sample_table).where(sample_table.c.series_key.in_(keys))):
+        sample = samples.setdefault(row.series_key, {"seen": row.seen, "slots": {}})
+        sample["slots"][row.slot] = row.row_id
+    return samples
+
+
+def _write_samples(conn, sample_table, samples: dict, keys=None):
+    if keys is None:
+        conn.execute(sample_table.delete())
+    else:
+        conn.execute(sample_table.delete().where(sample_table.c.series_key.in_(keys)))
+
+    records = [
+        {"series_key": key, "slot": slot, "row_id": row_id, "seen": sample["seen"]}
+        for key, sample in samples.items()
+        for slot, row_id in sample["slots"].items()
+    ]
+    if records:
+        conn.execute(sample_table.insert(), records)
+
+
+def _slot(training_policy: dict, key: str, seen: int):
+    if training_policy["policy"] == POLICY_WINDOW:
+        # A linha nova ocupa a posição da mais antiga da janela
+        return seen % training_policy["window"]
+    return reservoir_slot(key, seen, training_policy["reservoir_size"])
+
+
+def _offer(samples: dict, accepted: pd.DataFrame, config: dict, training_policy: dict):
+    keys = accepted[config["series_column"]].map(series_key).to_numpy()
+    for key, row_id in zip(keys, accepted["id"].to_numpy()):
+        if key is None:
+            continue
+        sample = samples.setdefault(key, {"seen": 0, "slots": {}})
+        slot = _slot(training_policy, key, sample["seen"])
+        if slot is not None:
+            sample["slots"][slot] = int(row_id)
+        sample["seen"] += 1
+    return samples
+
+
+def _accepted_rows(data: pd.DataFrame, config: dict):
+    # Apenas linhas que entram no treino: aceitas e com a variável de análise preenchida
+    accepted = data[(data["anomalia"] == False) & data[config["analysis_variable"]].notna()]
+    return accepted.sort_values("id")
+
+
+def rebuild_training_sample(conn, table_name: str, config: dict, series_values=None):
+    training_policy = get_training_policy(config)
+    if training_policy["policy"] not in SAMPLED_POLICIES:
+        return
+
+    dynamic_table = get_table(table_name)
+    series_column = dynamic_table.c[config["series_column"]]
+    stmt = select(dynamic_table.c.id, dynamic_table.c.anomalia, series_column, dynamic_table.c[config["analysis_variable"]])
+    stmt = stmt.where(dynamic_table.c.anomalia == False).order_by(dynamic_table.c.id)
+
+    keys = None
+    if series_values is not None:
+        series_values = pd.Series(list(series_values)).dropna().unique().tolist()
+        stmt = stmt.where(series_column.in_(series_values))
+        keys = list({series_key(value) for value in series_values} - {None})
+
+    accepted = _accepted_rows(pd.read_sql(stmt, conn), config)
+    samples = _offer({}, accepted, config, training_policy)
+    _write_samples(conn, get_sample_table(table_name), samples, keys)
+
+
+def apply_sampled_rows(conn, table_name: str, config: dict, inserted_data: pd.DataFrame):
+    training_policy = get_training_policy(config)
+    if training_policy["policy"] not in SAMPLED_POLICIES:
+        return
+
+    accepted = _accepted_rows(inserted_data, config)
+    keys = list(set(accepted[config["series_column"]].map(series_key).dropna()))
+    if not keys:
+        return
+
+    sample_table = get_sample_table(table_name)
+    samples = _offer(_read_samples(conn, sample_table, keys), accepted, config, training_policy)
+    _write_samples(conn, sample_table, samples, keys)
@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+# Pontos máximos por linha do gráfico em cada nível de detalhe
+ZOOM_LEVELS = {"Baixo": 250, "Médio": 1000, "Alto": 4000}
+ZOOM_CACHE_SIZE = 16
+
+# Compartilhado entre as sessões do Streamlit, que rodam em threads diferentes
+_lock = threading.Lock()
+_zoom_cache = OrderedDict()
+
+
+def minmax_downsample(data: pd.DataFrame, x: str, y: str, group: str = None, max_points: int = 1000):
+    data = data[data[y].notna()]
+    if data.empty:
+        return data
+
+    group_keys = data[group] if group else pd.Series(0, index=data.index)
+    data = data.assign(_group=group_keys.to_numpy()).sort_values(["_group", x, "id"], kind="stable")
+
+    grouped = data.groupby("_group", sort=False, dropna=False)
+    position = grouped.cumcount().to_numpy()
+    size = grouped[y].transform("size").to_numpy()
+
+    # Cada balde mantém o menor e o maior valor; linhas curtas ficam com um ponto por balde
+    n_buckets = max(max_points // 2, 1)
+    bucket = np.where(size > max_points, position * n_buckets // size, position)
+    data = data.assign(_bucket=bucket)
+
+    buckets = data.groupby(["_group", "_bucket"], sort=False, dropna=False)[y]
+    keep = pd.Index(buckets.idxmin().to_numpy()).union(pd.Index(buckets.idxmax().to_numpy()))
+
+    return data.loc[keep].sort_values(["_group", x, "id"], kind="stable").drop(columns=["_group", "_bucket"])
+
+
+def zoom_levels(cache_key, data: pd.DataFrame, x: str, y: str, group: str = None):
+    with _lock:
+        levels = _zoom_cache.get(cache_key)
+        if levels is not None:
+            _zoom_cache.move_to_end(cache_key)
+            return levels
+
+    levels = {name: minmax_downsample(data, x, y, group, max_points) for name, max_points in ZOOM_LEVELS.items()}
+
+    with _lock:
+        _zoom_cache[cache_key] = levels
+        while len(_zoom_cache) > ZOOM_CACHE_SIZE:
+            _zoom_cache.popitem(last=False)
+    return levels
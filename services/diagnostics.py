@@ -0,0 +1,49 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_SPANS = 2000
+
+# Medições recentes de cada etapa, compartilhadas por todas as sessões do processo
+_lock = threading.Lock()
+_spans = deque(maxlen=MAX_SPANS)
+_counters = {}
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    record = {"stage": stage, "timestamp": time.time(), **attributes}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        with _lock:
+            _spans.append(record)
+
+
+def increment(counter: str, value: int = 1):
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + int(value)
+
+
+def get_spans():
+    with _lock:
+        return list(_spans)
+
+
+def get_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def export_json():
+    return json.dumps({"counters": get_counters(), "spans": get_spans()}, indent=2, default=str)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
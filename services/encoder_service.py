@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from services.diagnostics import increment
+
+ENCODER_VERSION = 1
+OTHER_CATEGORY = "__outros__"
+MAX_CATEGORIES = 50
+SPARSE_MIN_COLUMNS = 64
+
+# Esquema de codificação salvo com a configuração:
+# {"version", "columns": {coluna: [categorias em ordem fixa]}, "numeric": [...], "sparse": bool}
+# Categorias fora do vocabulário (novas ou raras) vão para a coluna OTHER_CATEGORY da variável.
+
+
+def _category_labels(values: pd.Series):
+    return values.map(lambda value: None if pd.isna(value) else str(value))
+
+
+def _vocabulary(values: pd.Series, known=None, max_categories: int = MAX_CATEGORIES):
+    # Categorias já conhecidas mantêm a posição; novas entram ao final, em ordem alfabética
+    vocabulary = list(known or [])
+    counts = _category_labels(values).value_counts()
+    new_categories = sorted(category for category in counts.index if category not in vocabulary)
+    room = max(max_categories - len(vocabulary), 0)
+    if len(new_categories) > room:
+        # Mantém as mais frequentes; as demais são tratadas como OTHER_CATEGORY
+        new_categories = sorted(counts[new_categories].sort_values(ascending=False, kind="stable").index[:room])
+    return vocabulary + new_categories
+
+
+def categorical_columns(data: pd.DataFrame, columns):
+    return [col for col in columns if col in data.columns and not pd.api.types.is_numeric_dtype(data[col])]
+
+
+def fit_encoder(data: pd.DataFrame, columns, schema: dict = None, sparse_output: bool = None):
+    categorical = categorical_columns(data, columns)
+    numeric = [col for col in columns if col not in categorical]
+
+    # Um esquema de outra combinação de colunas não é reaproveitado
+    if schema is None or schema.get("version") != ENCODER_VERSION or set(schema["columns"]) != set(categorical) or schema["numeric"] != numeric:
+        schema = None
+
+    encoded_columns = {col: _vocabulary(data[col], schema["columns"][col] if schema else None) for col in categorical}
+    if sparse_output is None:
+        sparse_output = schema["sparse"] if schema else sum(len(vocabulary) + 1 for vocabulary in encoded_columns.values()) >= SPARSE_MIN_COLUMNS
+
+    return {
+        "version": ENCODER_VERSION,
+        "columns": encoded_columns,
+        "numeric": numeric,
+        "sparse": bool(sparse_output),
+    }
+
+
+def feature_names(schema: dict):
+    names = [str(col) for col in schema["numeric"]]
+    for col, vocabulary in schema["columns"].items():
+        names += [f"{col}_{category}" for category in vocabulary] + [f"{col}_{OTHER_CATEGORY}"]
+    return names
+
+
+def encode(schema: dict, data: pd.DataFrame):
+    rows = len(data)
+    numeric = data.reindex(columns=schema["numeric"]).apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    # Cada categoria vira um índice fixo; a matriz é montada diretamente a partir dos índices
+    row_index, col_index, offset, unknown = [], [], numeric.shape[1], 0
+    for col, vocabulary in schema["columns"].items():
+        labels = _category_labels(data[col]) if col in data.columns else pd.Series([None] * rows, index=data.index)
+        codes = pd.Categorical(labels, categories=vocabulary).codes.astype(np.int64)
+        missing = codes < 0
+        unknown += int((missing & labels.notna().to_numpy()).sum())
+        codes[missing] = len(vocabulary)
+        row_index.append(np.arange(rows))
+        col_index.append(codes + offset)
+        offset += len(vocabulary) + 1
+
+    if unknown:
+        increment("unknown_categories", unknown)
+
+    row_index = np.concatenate(row_index) if row_index else np.zeros(0, dtype=np.int64)
+    col_index = np.concatenate(col_index) if col_index else np.zeros(0, dtype=np.int64)
+    if schema["sparse"]:
+        from scipy import sparse
+
+        one_hot = sparse.csr_matrix((np.ones(len(row_index)), (row_index, col_index - numeric.shape[1])), shape=(rows, offset - numeric.shape[1]))
+        return sparse.hstack([sparse.csr_matrix(numeric), one_hot], format="csr")
+
+    matrix = np.zeros((rows, offset))
+    matrix[:, : numeric.shape[1]] = numeric
+    matrix[row_index, col_index] = 1.0
+    return matrix
+
+
+def append_column(matrix, values):
+    values = np.asarray(values, dtype=float).reshape(-1, 1)
+    if isinstance(matrix, np.ndarray):
+        return np.hstack([matrix, values])
+
+    from scipy import sparse
+
+    return sparse.hstack([matrix, sparse.csr_matrix(values)], format="csr")
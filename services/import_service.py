@@ -0,0 +1,98 @@
+import pandas as pd
+
+CHUNK_SIZE = 5000
+PREVIEW_ROWS = 100
+MAX_FILTER_OPTIONS = 10
+
+
+def is_excel(file_name: str):
+    return file_name.endswith(".xlsx")
+
+
+def is_parquet(file_name: str):
+    return file_name.endswith(".parquet")
+
+
+def _iter_excel_chunks(uploaded_file, chunksize: int):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=header).infer_objects()
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header).infer_objects()
+    finally:
+        workbook.close()
+
+
+def iter_chunks(uploaded_file, chunksize: int = CHUNK_SIZE):
+    uploaded_file.seek(0)
+    if is_excel(uploaded_file.name):
+        yield from _iter_excel_chunks(uploaded_file, chunksize)
+    elif is_parquet(uploaded_file.name):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(uploaded_file).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(uploaded_file, chunksize=chunksize) as reader:
+            yield from reader
+
+
+def read_sample(uploaded_file, rows: int = PREVIEW_ROWS):
+    return next(iter_chunks(uploaded_file, rows), pd.DataFrame())
+
+
+def count_rows(uploaded_file):
+    uploaded_file.seek(0)
+    if is_excel(uploaded_file.name):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(uploaded_file, read_only=True)
+        total = max((workbook.active.max_row or 1) - 1, 0)
+        workbook.close()
+    elif is_parquet(uploaded_file.name):
+        import pyarrow.parquet as pq
+
+        total = pq.ParquetFile(uploaded_file).metadata.num_rows
+    else:
+        total = -1
+        for block in iter(lambda: uploaded_file.read(1 << 20), b""):
+            total += block.count(b"\n")
+        uploaded_file.seek(-1, 2)
+        if uploaded_file.read(1) != b"\n":
+            total += 1
+    uploaded_file.seek(0)
+    return max(total, 0)
+
+
+def profile_columns(uploaded_file, chunksize: int = CHUNK_SIZE):
+    # Intervalos e valores distintos de cada coluna, lidos em blocos para não carregar a planilha inteira
+    profile = {}
+    for chunk in iter_chunks(uploaded_file, chunksize):
+        for col in chunk.columns:
+            column = profile.setdefault(col, {"numeric": True, "integer": True, "min": None, "max": None, "values": set()})
+            values = chunk[col].dropna()
+            if values.empty:
+                continue
+
+            if column["numeric"] and pd.api.types.is_numeric_dtype(values):
+                column["integer"] = column["integer"] and pd.api.types.is_integer_dtype(values)
+                column["min"] = values.min() if column["min"] is None else min(column["min"], values.min())
+                column["max"] = values.max() if column["max"] is None else max(column["max"], values.max())
+            else:
+                column["numeric"] = False
+
+            if len(column["values"]) <= MAX_FILTER_OPTIONS:
+                column["values"].update(values.unique()[: MAX_FILTER_OPTIONS + 1].tolist())
+    return profile
@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Boolean, Float, Integer
+
+from services.diagnostics import span, increment
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_WINDOW_SECONDS = 0.2
+
+# Um buffer por série; cada um tem uma thread que valida e grava os lotes em ordem de chegada
+_lock = threading.Lock()
+_buffers = {}
+
+
+def _get_buffer(nome_serie: str, batch_size: int, window_seconds: float):
+    with _lock:
+        buffer = _buffers.get(nome_serie)
+        if buffer is None:
+            buffer = {
+                "nome_serie": nome_serie,
+                "batch_size": batch_size,
+                "window_seconds": window_seconds,
+                "condition": threading.Condition(),
+                "pending": [],
+                "pending_rows": 0,
+            }
+            threading.Thread(target=_flush_loop, args=(buffer,), name=f"ingestion-{nome_serie}", daemon=True).start()
+            _buffers[nome_serie] = buffer
+        return buffer
+
+
+def submit_entries(nome_serie: str, entries: list, batch_size: int = DEFAULT_BATCH_SIZE, window_seconds: float = DEFAULT_WINDOW_SECONDS):
+    # O resultado de cada envio é entregue quando o lote que o contém for gravado
+    future = Future()
+    buffer = _get_buffer(nome_serie, batch_size, window_seconds)
+    with buffer["condition"]:
+        buffer["pending"].append({"entries": entries, "future": future, "received": time.monotonic()})
+        buffer["pending_rows"] += len(entries)
+        buffer["condition"].notify()
+    return future
+
+
+def _take_batch(buffer):
+    with buffer["condition"]:
+        while not buffer["pending"]:
+            buffer["condition"].wait()
+
+        # Espera completar o lote ou esgotar a janela do envio mais antigo
+        deadline = buffer["pending"][0]["received"] + buffer["window_seconds"]
+        while buffer["pending_rows"] < buffer["batch_size"]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            buffer["condition"].wait(remaining)
+
+        batch, rows = [], 0
+        while buffer["pending"] and (not batch or rows + len(buffer["pending"][0]["entries"]) <= buffer["batch_size"]):
+            request = buffer["pending"].pop(0)
+            batch.append(request)
+            rows += len(request["entries"])
+        buffer["pending_rows"] -= rows
+        return batch
+
+
+def _flush_loop(buffer):
+    while True:
+        batch = _take_batch(buffer)
+        try:
+            results = save_batch(buffer["nome_serie"], [request["entries"] for request in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0]["future"].set_exception(e)
+                continue
+            # O lote foi desfeito; cada envio é gravado sozinho para que um registro inválido
+            # não recuse os registros dos outros dispositivos
+            increment("ingestion_batch_retries")
+            for request in batch:
+                try:
+                    result = save_batch(buffer["nome_serie"], [request["entries"]])[0]
+                except Exception as request_error:
+                    request["future"].set_exception(request_error)
+                else:
+                    request["future"].set_result(result)
+        else:
+            for request, result in zip(batch, results):
+                request["future"].set_result(result)
+
+
+def invalid_values(config: dict, entries: list):
+    # Valores não numéricos em colunas numéricas fariam a inserção do lote falhar
+    from database.dynamic_table_service import load_columns_info
+
+    numeric_columns = [
+        column["name"] for column in load_columns_info(config["dynamic_table_name"])
+        if isinstance(column["type"], (Integer, Float)) and not isinstance(column["type"], Boolean)
+    ]
+    entries = pd.DataFrame(entries)
+    errors = []
+    for col in numeric_columns:
+        if col not in entries:
+            continue
+        values = entries[col]
+        invalid = pd.to_numeric(values, errors="coerce").isna() & values.notna()
+        for position in np.flatnonzero(invalid.to_numpy()):
+            errors.append(f"Registro {position}: valor inválido para {col}: {values.iloc[position]!r}")
+    return errors
+
+
+def save_batch(nome_serie: str, requests: list):
+    from database.configuration_service import get_configuration
+    from database.dynamic_table_service import save_data
+
+    config = get_configuration(nome_serie)
+    if config is None:
+        raise KeyError(f"Configuração '{nome_serie}' não encontrada.")
+
+    entries = pd.DataFrame([entry for request in requests for entry in request])
+    with span("ingestion_batch", series=nome_serie, requests=len(requests), rows=len(entries)):
+        validated_data = save_data(config["dynamic_table_name"], entries, config)
+    increment("ingestion_batches")
+
+    # O lote é dividido de volta na ordem em que os envios foram agrupados
+    results, start = [], 0
+    for request in requests:
+        results.append(validated_data.iloc[start:start + len(request)])
+        start += len(request)
+    return results
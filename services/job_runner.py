@@ -0,0 +1,189 @@
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import job_service
+from database.job_service import JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_QUEUED
+from services.import_service import CHUNK_SIZE, iter_chunks
+
+JOB_IMPORT = "import"
+JOB_RESCORE = "rescore"
+JOB_LABELS = {
+    JOB_IMPORT: "Importação",
+    JOB_RESCORE: "Reavaliação da série",
+}
+STATUS_LABELS = {
+    job_service.JOB_QUEUED: "Na fila",
+    job_service.JOB_RUNNING: "Em execução",
+    JOB_DONE: "Concluído",
+    JOB_FAILED: "Falhou",
+    JOB_CANCELLED: "Cancelado",
+}
+
+UPLOADS_DIR = os.path.join("data", "uploads")
+MAX_WORKERS = int(os.environ.get("JOB_WORKERS", 1))
+HEARTBEAT_SECONDS = 15
+# Sem sinal de vida por este tempo, o processo dono do job é considerado parado
+STALE_SECONDS = 120
+
+# Identifica este processo nos jobs que ele executa
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Executor compartilhado pelo processo: os jobs continuam se a sessão do navegador cair
+_lock = threading.Lock()
+_executor = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+            # Jobs interrompidos por uma parada de processo são retomados do último checkpoint
+            for job_id in job_service.requeue_interrupted_jobs(STALE_SECONDS):
+                _executor.submit(_run, job_id)
+            threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True).start()
+        return _executor
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        try:
+            job_service.heartbeat(WORKER_ID)
+            for job_id in job_service.requeue_stale_jobs(STALE_SECONDS):
+                _executor.submit(_run, job_id)
+        except SQLAlchemyError:
+            # Banco ocupado por uma gravação longa; tenta de novo no próximo ciclo
+            continue
+
+
+def start_worker():
+    _get_executor()
+
+
+def store_upload(uploaded_file):
+    # O arquivo enviado só existe durante a sessão; o job lê uma cópia em disco
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    path = os.path.join(UPLOADS_DIR, f"{uuid.uuid4().hex}{extension}")
+    uploaded_file.seek(0)
+    with open(path, "wb") as target:
+        shutil.copyfileobj(uploaded_file, target)
+    uploaded_file.seek(0)
+    return path
+
+
+def submit_job(kind: str, nome_serie: str, params: dict = None, total_rows: int = None):
+    job_id = job_service.create_job(kind, nome_serie, params, total_rows)
+    _get_executor().submit(_run, job_id)
+    return job_id
+
+
+def submit_import(nome_serie: str, uploaded_file, total_rows: int = None, parallel: bool = False):
+    params = {"path": store_upload(uploaded_file), "parallel": parallel, "chunk_size": CHUNK_SIZE}
+    return submit_job(JOB_IMPORT, nome_serie, params, total_rows)
+
+
+def submit_rescore(nome_serie: str):
+    return submit_job(JOB_RESCORE, nome_serie)
+
+
+def cancel_job(job_id: int):
+    job_service.request_cancel(job_id)
+
+
+def resume_job(job_id: int):
+    job = job_service.get_job(job_id)
+    if job and job["status"] == JOB_FAILED:
+        job_service.finish_job(job_id, JOB_QUEUED)
+        _get_executor().submit(_run, job_id)
+
+
+def _check_cancelled(job_id: int, conn=None):
+    if job_service.is_cancel_requested(job_id, conn):
+        raise JobCancelled()
+
+
+def _run(job_id: int):
+    if not job_service.claim_job(job_id, WORKER_ID):
+        return
+
+    job = job_service.get_job(job_id)
+    try:
+        HANDLERS[job["kind"]](job)
+    except JobCancelled:
+        job_service.finish_job(job_id, JOB_CANCELLED, "Cancelado pelo usuário.")
+        _cleanup(job)
+    except Exception as e:
+        # O arquivo é mantido para que o job possa ser retomado
+        job_service.finish_job(job_id, JOB_FAILED, str(e))
+    else:
+        job_service.finish_job(job_id, JOB_DONE)
+        _cleanup(job)
+
+
+def _cleanup(job):
+    path = (job["params"] or {}).get("path")
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def _run_import(job):
+    from database.configuration_service import get_configuration
+    from database.dynamic_table_service import save_data
+
+    config = get_configuration(job["nome_serie"])
+    if config is None:
+        raise ValueError(f"Configuração '{job['nome_serie']}' não encontrada.")
+
+    params = job["params"]
+    chunk_index, rows, anomalies = job["checkpoint"], job["processed_rows"], job["anomalies"]
+    with open(params["path"], "rb") as source:
+        # Os blocos anteriores ao checkpoint já foram gravados e são pulados na retomada
+        for chunk in islice(iter_chunks(source, params.get("chunk_size", CHUNK_SIZE)), chunk_index, None):
+            _check_cancelled(job["id"])
+
+            def checkpoint(conn, validated_data):
+                job_service.save_checkpoint(
+                    conn, job["id"], chunk_index + 1, rows + len(validated_data), anomalies + int(validated_data["anomalia"].sum())
+                )
+
+            validated_data = save_data(config["dynamic_table_name"], chunk, config, parallel=params.get("parallel", False), before_commit=checkpoint)
+            chunk_index += 1
+            rows += len(validated_data)
+            anomalies += int(validated_data["anomalia"].sum())
+
+
+def _run_rescore(job):
+    from database.configuration_service import get_configuration
+    from database.dynamic_table_service import rescore_series
+
+    config = get_configuration(job["nome_serie"])
+    if config is None:
+        raise ValueError(f"Configuração '{job['nome_serie']}' não encontrada.")
+
+    def report_progress(conn, rows, total):
+        # Um cancelamento desfaz apenas o bloco em andamento
+        _check_cancelled(job["id"], conn)
+        job_service.save_checkpoint(conn, job["id"], 0, rows, 0, total_rows=total)
+
+    changed, anomalies = rescore_series(config["dynamic_table_name"], config, progress_callback=report_progress)
+    job_service.set_progress(job["id"], changed, anomalies, total_rows=changed)
+
+
+HANDLERS = {
+    JOB_IMPORT: _run_import,
+    JOB_RESCORE: _run_rescore,
+}
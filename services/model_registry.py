@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import uuid
+
+MODELS_DIR = os.path.join("data", "models")
+MAX_ARTIFACTS = 128
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def _artifact_prefix(table_name: str, signature):
+    return f"{table_name}__{_digest(signature)}__"
+
+
+def artifact_path(table_name: str, signature, version):
+    return os.path.join(MODELS_DIR, f"{_artifact_prefix(table_name, signature)}{_digest(version)}.joblib")
+
+
+def _remove(path):
+    # Outro processo ou thread pode ter removido o arquivo antes
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def load_models(table_name: str, signature, version):
+    path = artifact_path(table_name, signature, version)
+    if not os.path.exists(path):
+        return None
+
+    # joblib e os modelos (scikit-learn) só são carregados quando há artefato em disco
+    import joblib
+
+    try:
+        models = joblib.load(path)
+    except Exception:
+        _remove(path)
+        return None
+
+    # Atualiza a data de acesso para a política LRU
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return models
+
+
+def save_models(table_name: str, signature, version, models):
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = artifact_path(table_name, signature, version)
+
+    # Versões anteriores da mesma série e configuração ficam obsoletas; arquivos
+    # temporários de outras gravações em andamento são preservados
+    prefix = _artifact_prefix(table_name, signature)
+    for file_name in os.listdir(MODELS_DIR):
+        if file_name.startswith(prefix) and file_name.endswith(".joblib"):
+            _remove(os.path.join(MODELS_DIR, file_name))
+
+    import joblib
+
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    joblib.dump(models, temp_path)
+    os.replace(temp_path, path)
+    evict_models()
+
+
+def evict_models(max_artifacts: int = MAX_ARTIFACTS):
+    if not os.path.isdir(MODELS_DIR):
+        return
+
+    artifacts = []
+    for file_name in os.listdir(MODELS_DIR):
+        if file_name.endswith(".joblib"):
+            path = os.path.join(MODELS_DIR, file_name)
+            try:
+                artifacts.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+    artifacts.sort(reverse=True)
+    for _, path in artifacts[max_artifacts:]:
+        _remove(path)
+
+
+def clear_models(table_name: str):
+    if not os.path.isdir(MODELS_DIR):
+        return
+
+    for file_name in os.listdir(MODELS_DIR):
+        if file_name.startswith(f"{table_name}__"):
+            _remove(os.path.join(MODELS_DIR, file_name))
@@ -0,0 +1,66 @@
+import math
+
+ENGINE_BATCH = "batch"
+ENGINE_ONLINE = "online"
+ENGINES = {
+    ENGINE_BATCH: "Lote (IsolationForest + RandomForest)",
+    ENGINE_ONLINE: "Online (média móvel exponencial por série)",
+}
+
+DEFAULT_ALPHA = 0.1
+DEFAULT_Z_THRESHOLD = 3.0
+MIN_OBSERVATIONS = 5
+
+
+def get_engine(config: dict):
+    return (config.get("validations") or {}).get("engine", ENGINE_BATCH)
+
+
+def get_parameters(config: dict):
+    validations = config.get("validations") or {}
+    return (
+        float(validations.get("online_alpha", DEFAULT_ALPHA)),
+        float(validations.get("z_threshold", DEFAULT_Z_THRESHOLD)),
+    )
+
+
+def new_state():
+    return {"count": 0, "mean": 0.0, "var": 0.0}
+
+
+def score(state, value, z_threshold: float = DEFAULT_Z_THRESHOLD):
+    # Sem observações suficientes a série ainda não tem referência para o desvio
+    if state is None or state["count"] == 0 or value is None or math.isnan(value):
+        return False, None
+
+    suggested_value = round(state["mean"], 2)
+    if state["count"] < MIN_OBSERVATIONS:
+        return False, suggested_value
+
+    std = max(math.sqrt(state["var"]), abs(state["mean"]) * 1e-3, 1e-9)
+    return abs(value - state["mean"]) / std > z_threshold, suggested_value
+
+
+def update(state, value, alpha: float = DEFAULT_ALPHA, z_threshold: float = DEFAULT_Z_THRESHOLD):
+    state = dict(state) if state is not None else new_state()
+    if value is None or math.isnan(value):
+        return state
+
+    if state["count"] == 0:
+        state["mean"], state["var"] = float(value), 0.0
+    else:
+        # Média simples até acumular 1/alpha observações, depois média exponencial
+        weight = max(alpha, 1.0 / (state["count"] + 1))
+
+        # Valores extremos são limitados para não deslocar a referência da série
+        if state["count"] >= MIN_OBSERVATIONS and state["var"] > 0:
+            limit = z_threshold * math.sqrt(state["var"])
+            value = min(max(value, state["mean"] - limit), state["mean"] + limit)
+
+        diff = value - state["mean"]
+        increment = weight * diff
+        state["mean"] += increment
+        state["var"] = (1 - weight) * (state["var"] + diff * increment)
+
+    state["count"] += 1
+    return state
@@ -0,0 +1,45 @@
+import random
+import zlib
+
+POLICY_ALL = "all"
+POLICY_WINDOW = "window"
+POLICY_PERIODS = "periods"
+POLICY_RESERVOIR = "reservoir"
+POLICIES = {
+    POLICY_ALL: "Todo o histórico",
+    POLICY_WINDOW: "Últimos registros de cada série",
+    POLICY_PERIODS: "Últimos períodos da coluna da série",
+    POLICY_RESERVOIR: "Amostra estratificada por série (reservatório)",
+}
+
+DEFAULT_WINDOW = 500
+DEFAULT_PERIODS = 12
+DEFAULT_RESERVOIR_SIZE = 200
+
+
+def get_training_policy(config: dict):
+    validations = config.get("validations") or {}
+    window = validations.get("history_window")
+
+    # Configurações antigas só tinham a janela por série
+    policy = validations.get("training_policy") or (POLICY_WINDOW if window else POLICY_ALL)
+    return {
+        "policy": policy,
+        "window": int(window or DEFAULT_WINDOW) if policy == POLICY_WINDOW else None,
+        "periods": int(validations.get("training_periods") or DEFAULT_PERIODS) if policy == POLICY_PERIODS else None,
+        "reservoir_size": int(validations.get("reservoir_size") or DEFAULT_RESERVOIR_SIZE) if policy == POLICY_RESERVOIR else None,
+        "max_rows": int(validations.get("max_training_rows") or 0) or None,
+    }
+
+
+def policy_signature(config: dict):
+    return tuple(sorted(get_training_policy(config).items()))
+
+
+def reservoir_slot(key: str, seen: int, capacity: int):
+    # Algoritmo R com sorteio determinístico por (série, posição): reconstruir a amostra
+    # a partir do histórico produz exatamente a amostra mantida incrementalmente
+    if seen < capacity:
+        return seen
+    slot = random.Random(zlib.crc32(f"{key}:{seen}".encode("utf-8"))).randint(0, seen)
+    return slot if slot < capacity else None
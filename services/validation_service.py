@@ -1,136 +1,584 @@
+import os
+import pickle
+import threading
 import pandas as pd
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
 
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.ensemble import IsolationForest
+from services.model_registry import load_models, save_models
+from services.encoder_service import fit_encoder, encode, append_column, feature_names
+from services.training_policy import policy_signature
+from services import online_engine
+from services.diagnostics import span, increment
 
+MODEL_CACHE_SIZE = 64
+MIN_SHARD_ROWS = 10
+PARALLEL_MIN_ROWS = 2000
 
-def detect_anomalies_with_prediction(data, new_entry, config):
+# Pool de processos da validação em paralelo, criado no primeiro uso e mantido entre os blocos
+_pool_lock = threading.Lock()
+_pool = None
 
-    # Se não houver dados, não é possível fazer a detecção de anomalias
-    if data.empty:
-        return False, None
-        
-    auxiliary_variables = config.get("auxiliary_variables", [])
-    analysis_variable = config["analysis_variable"]
-    series_column = config["series_column"]
+# Modelos treinados, indexados por série, assinatura da configuração e versão dos dados.
+# Usado pelas sessões do Streamlit, pelo executor de tarefas e pela ingestão, em threads diferentes
+_model_cache_lock = threading.Lock()
+_model_cache = OrderedDict()
 
-    categorical_columns = data[auxiliary_variables].select_dtypes(include=["object", "category"]).columns.tolist()
 
+def get_contamination(config):
     contamination = config.get("contamination", 0.005)
-    contamination = round(min(max(contamination, 0.005), 0.5), 3)  
+    return round(min(max(contamination, 0.005), 0.5), 3)
+
+
+def config_signature(config):
+    return (
+        config["series_column"],
+        config["analysis_variable"],
+        tuple(config.get("auxiliary_variables", []) or []),
+        get_contamination(config),
+        policy_signature(config),
+        get_shard_key(config),
+    )
+
+
+def data_version(training_data: pd.DataFrame, config: dict):
+    if training_data.empty:
+        return (0, None, 0.0)
+    return (
+        int(training_data[config["analysis_variable"]].count()),
+        int(training_data["id"].max()),
+        round(float(training_data[config["analysis_variable"]].sum()), 4),
+    )
+
+
+def _remember_models(cache_key, models):
+    with _model_cache_lock:
+        _model_cache[cache_key] = models
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+
+
+def _models_signature(config: dict, shard=None):
+    signature = config_signature(config)
+    return signature if shard is None else signature + (("shard", shard),)
+
+
+def get_cached_models(config: dict, version, shard=None):
+    series_name = config.get("dynamic_table_name", config.get("nome_serie"))
+    signature = _models_signature(config, shard)
+    cache_key = (series_name, signature, version)
+
+    with _model_cache_lock:
+        models = _model_cache.get(cache_key)
+        if models is not None:
+            _model_cache.move_to_end(cache_key)
+    if models is not None:
+        increment("model_cache_hits")
+        return models
 
-    data_encoded = data[data["anomalia"] == False]   
+    # Os modelos por grupo ficam no registro individualmente, não o conjunto
+    if get_shard_key(config) and shard is None:
+        return None
 
-    data_encoded = pd.get_dummies(data_encoded, columns=categorical_columns, drop_first=False)
-    new_entry_encoded = pd.get_dummies(new_entry, columns=categorical_columns, drop_first=False)
+    with span("model_registry_load", series=series_name):
+        models = load_models(series_name, signature, version)
+    # Artefatos anteriores ao esquema de codificação persistido são retreinados
+    if models is not None and "encoder" not in models:
+        models = None
+    if models is not None:
+        increment("model_registry_hits")
+        _remember_models(cache_key, models)
+    return models
 
 
-    combined_columns = list(set(data_encoded.columns).union(set(new_entry_encoded.columns)))
-    data_encoded = data_encoded.reindex(columns=combined_columns, fill_value=0)
-    new_entry_encoded = new_entry_encoded.reindex(columns=combined_columns, fill_value=0)
+def _store_models(config: dict, version, models, shard=None, persist: bool = True):
+    series_name = config.get("dynamic_table_name", config.get("nome_serie"))
+    signature = _models_signature(config, shard)
+    _remember_models((series_name, signature, version), models)
+    if persist:
+        save_models(series_name, signature, version, models)
 
-    dummy_columns = [col for col in data_encoded.columns if col.startswith(tuple(categorical_columns))]
-    auxiliary_variables = [col for col in auxiliary_variables if col not in categorical_columns]
 
-    features =  [series_column] +  auxiliary_variables + dummy_columns
+def get_shard_key(config: dict):
+    return (config.get("validations") or {}).get("shard_key") or None
 
-    def detect_anomalies(data_encoded, new_entry_encoded):
-        anomaly_features = features + [analysis_variable]         
-        if not all(field in data_encoded.columns for field in anomaly_features):
-            raise ValueError("Dados incompletos para a detecção de anomalias.")
 
-        X = data_encoded[anomaly_features]
-        X = X.rename(str, axis="columns")
+def feature_columns(config: dict):
+    columns = [config["series_column"]]
+    columns += [col for col in config.get("auxiliary_variables", []) or [] if col not in columns and col != config["analysis_variable"]]
+    # Dentro de um grupo a coluna do grupo é constante e não serve como feature
+    return [col for col in columns if col != get_shard_key(config)]
 
-        new_entry_encoded = new_entry_encoded[X.columns]
-        new_entry_encoded = new_entry_encoded.fillna(0)  
-        new_entry_encoded = new_entry_encoded.rename(str, axis="columns")
 
-        isolation_model = IsolationForest(contamination=contamination, random_state=42)
+def _fit_model_set(training_data: pd.DataFrame, config: dict):
+    # O scikit-learn só é carregado no primeiro treino, não na abertura do app
+    from sklearn.ensemble import IsolationForest, RandomForestRegressor
+
+    analysis_variable = config["analysis_variable"]
+
+    # O vocabulário salvo na configuração é estendido, nunca reordenado
+    encoder = fit_encoder(training_data, feature_columns(config), config.get("encoder"), (config.get("validations") or {}).get("sparse_encoding"))
+
+    with span("encode", rows=len(training_data)):
+        X_features = encode(encoder, training_data)
+        X = append_column(X_features, training_data[analysis_variable])
+
+    with span("isolation_forest_fit", rows=X.shape[0], features=X.shape[1]):
+        isolation_model = IsolationForest(contamination=get_contamination(config), random_state=42)
         isolation_model.fit(X)
-        anomaly_score = isolation_model.decision_function(new_entry_encoded)
-        is_anomaly = anomaly_score[0] < 0  
-        return is_anomaly
-    
-    def predict_value(data_encoded, new_entry_encoded):        
-        if not all(field in data_encoded.columns for field in features):
-            raise ValueError("Dados incompletos para a predição.")
-
-        X = data_encoded[features]
-        y = data_encoded[analysis_variable]
-        X = X.rename(str, axis="columns")
 
+    with span("random_forest_fit", rows=X.shape[0], features=X_features.shape[1]):
         regressor = RandomForestRegressor(random_state=42)
-        regressor.fit(X, y)
-        new_entry_encoded = new_entry_encoded[X.columns]
-        new_entry_encoded = new_entry_encoded.rename(str, axis="columns")
+        regressor.fit(X_features, training_data[analysis_variable].to_numpy(dtype=float))
+
+    return {
+        "isolation_model": isolation_model,
+        "regressor": regressor,
+        "encoder": encoder,
+        "features": feature_names(encoder),
+    }
+
+
+def fit_models(data, config, version=None):
+    # Se não houver dados, não é possível fazer a detecção de anomalias
+    if data.empty:
+        return None
+
+    training_data = data[data["anomalia"] == False]
+    if training_data.empty:
+        return None
+
+    # A versão pode vir do banco quando o histórico carregado é apenas uma janela
+    if version is None:
+        version = data_version(training_data, config)
+    models = get_cached_models(config, version)
+    if models is not None:
+        return models
+
+    training_data = training_data[training_data[config["analysis_variable"]].notna()]
+    if training_data.empty:
+        return None
+
+    if get_shard_key(config):
+        models = fit_sharded_models(training_data, config)
+        _store_models(config, version, models, persist=False)
+        return models
+
+    models = _fit_model_set(training_data, config)
+    increment("models_fitted", 2)
+    _store_models(config, version, models)
+    return models
+
+
+def fit_shard_models(data: pd.DataFrame, config: dict, version, shard_versions: dict):
+    # As versões de cada grupo vêm do banco: data traz apenas os grupos cuja versão mudou,
+    # os demais vêm do cache ou do registro de modelos
+    models = get_cached_models(config, version)
+    if models is None:
+        training_data = data if data.empty else data[(data["anomalia"] == False) & data[config["analysis_variable"]].notna()]
+        models = fit_sharded_models(training_data, config, shard_versions)
+        _store_models(config, version, models, persist=False)
+    return models
+
+
+def fit_sharded_models(training_data: pd.DataFrame, config: dict, shard_versions: dict = None):
+    # Um conjunto de modelos por valor da coluna do grupo; cada grupo tem sua própria versão,
+    # então gravações em um grupo só retreinam os modelos desse grupo
+    shard_key = get_shard_key(config)
+    groups = {} if training_data.empty else dict(list(training_data.groupby(training_data[shard_key].map(series_key), sort=True)))
+    if shard_versions is None:
+        shard_versions = {label: data_version(shard_data, config) for label, shard_data in groups.items()}
+
+    shards, pending = {}, []
+    for label in sorted(shard_versions):
+        version, shard_data = shard_versions[label], groups.get(label)
+        # Grupos não carregados têm no máximo as linhas contadas na versão
+        if (len(shard_data) if shard_data is not None else version[0]) < MIN_SHARD_ROWS:
+            continue
+        models = get_cached_models(config, version, shard=label)
+        if models is not None:
+            shards[label] = models
+        elif shard_data is not None:
+            pending.append((label, version, shard_data))
+
+    if pending:
+        n_jobs = (config.get("validations") or {}).get("shard_jobs", -1)
+        with span("fit_shards", shards=len(pending), rows=sum(len(shard_data) for _, _, shard_data in pending)):
+            if len(pending) > 1:
+                from joblib import Parallel, delayed
+                fitted = Parallel(n_jobs=n_jobs)(delayed(_fit_model_set)(shard_data, config) for _, _, shard_data in pending)
+            else:
+                fitted = [_fit_model_set(pending[0][2], config)]
+        increment("models_fitted", 2 * len(pending))
+        for (label, version, _), models in zip(pending, fitted):
+            _store_models(config, version, models, shard=label)
+            shards[label] = models
+
+    return {"shard_key": shard_key, "shards": shards}
+
+
+def score_entries(models, new_entries: pd.DataFrame, config: dict):
+    if models is None or new_entries.empty:
+        return np.zeros(len(new_entries), dtype=bool), np.full(len(new_entries), None, dtype=object)
+
+    if "shards" in models:
+        return _score_sharded(models, new_entries, config)
+
+    with span("score", rows=len(new_entries)):
+        X_features = encode(models["encoder"], new_entries)
+        X = append_column(X_features, pd.to_numeric(new_entries[config["analysis_variable"]], errors="coerce").fillna(0))
+
+        anomaly_scores = models["isolation_model"].decision_function(X)
+        predicted_values = models["regressor"].predict(X_features)
+
+    return anomaly_scores < 0, np.round(predicted_values, 2).astype(object)
+
+
+def _score_sharded(models, new_entries: pd.DataFrame, config: dict):
+    # Cada registro é avaliado pelos modelos do seu grupo; grupos sem modelo não recebem sugestão da IA
+    is_anomaly = np.zeros(len(new_entries), dtype=bool)
+    suggested = np.full(len(new_entries), None, dtype=object)
+    labels = new_entries[models["shard_key"]].map(series_key).to_numpy()
+
+    unrouted = 0
+    for label in pd.unique(labels):
+        positions = np.flatnonzero(labels == label)
+        shard_models = models["shards"].get(label)
+        if shard_models is None:
+            unrouted += len(positions)
+            continue
+        is_anomaly[positions], suggested[positions] = score_entries(shard_models, new_entries.iloc[positions], config)
+
+    if unrouted:
+        increment("rows_without_shard_model", unrouted)
+    return is_anomaly, suggested
+
+
+def detect_anomalies_with_prediction(data, new_entry, config):
+    models = fit_models(data, config)
+    is_anomaly, predicted_values = score_entries(models, new_entry, config)
+    return bool(is_anomaly[0]), predicted_values[0]
+
+
+def series_key(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value)
 
-        predicted_value = regressor.predict(new_entry_encoded)[0]
-        return round(predicted_value, 2)
 
-   
-    is_anomaly = detect_anomalies(data_encoded, new_entry_encoded.copy())
-    predicted_value = predict_value(data_encoded, new_entry_encoded.copy())
-                                    
-    return is_anomaly, predicted_value
+def compute_series_stats(data: pd.DataFrame, config: dict):
+    analysis_variable = config["analysis_variable"]
+    series_column = config["series_column"]
+
+    if data.empty:
+        return {}
+
+    training_data = data[data["anomalia"] == False]
+    if training_data.empty:
+        return {}
+
+    training_data = training_data.sort_values("id")
+    keys = training_data[series_column].map(series_key)
+    grouped = training_data.groupby(keys)
+
+    counts = grouped[analysis_variable].count()
+    sums = grouped[analysis_variable].sum()
+    last_rows = grouped.tail(1)
+    last_rows = last_rows.set_index(keys[last_rows.index])
+
+    return {
+        key: {
+            "count": int(counts[key]),
+            "sum": float(sums[key]),
+            "last_id": int(last_rows.at[key, "id"]),
+            "last_value": float(last_rows.at[key, analysis_variable]),
+        }
+        for key in counts.index
+    }
 
-def validate_and_suggest(data, new_entries: pd.DataFrame, config: dict):    
-    anomalias, correcao_sugerida = [], []
 
+def _rule_limits(stats, mean_threshold, last_threshold):
+    mean_limit = stats["sum"] / stats["count"] * (1 + mean_threshold) if stats["count"] else np.nan
+    last_limit = stats["last_value"] * (1 + last_threshold) if stats["last_value"] is not None else np.nan
+    return mean_limit, last_limit
+
+
+def validate_and_suggest(data, new_entries: pd.DataFrame, config: dict, refit_every: int = None, series_stats: dict = None, models=None, online_states: dict = None):
+    with span("validate_and_suggest", rows=len(new_entries)) as record:
+        validated_data = _validate_and_suggest(data, new_entries, config, refit_every, series_stats, models, online_states)
+        record["anomalies"] = int(validated_data["anomalia"].sum())
+
+    increment("rows_validated", len(validated_data))
+    increment("anomalies_detected", record["anomalies"])
+    return validated_data
+
+
+def _validate_and_suggest(data, new_entries, config, refit_every, series_stats, models, online_states):
     validations = config.get("validations", {})
     min_value = validations.get("min_value", None)
     max_value = validations.get("max_value", None)
     validate_mean = validations.get("validate_mean", False)
-    mean_threshold = validations.get("mean_threshold", 20) / 100  
+    mean_threshold = validations.get("mean_threshold", 20) / 100
     validate_last = validations.get("validate_last", False)
-    last_threshold = validations.get("last_threshold", 40) / 100  
-
-    analysis_variable = config["analysis_variable"]
-    series_column = config["series_column"]
+    last_threshold = validations.get("last_threshold", 40) / 100
 
-    for _, row in new_entries.iterrows():
-        race = row[series_column]
-        value = row[analysis_variable]
+    # Por padrão os modelos são treinados uma única vez por lote
+    if refit_every is None:
+        refit_every = validations.get("refit_every")
 
-        previous_data = data[data["anomalia"] == False]
-        previous_data = previous_data[previous_data[series_column] == race]
+    # O motor online não treina modelos: usa o estado de cada série, atualizado a cada valor aceito
+    online = online_engine.get_engine(config) == online_engine.ENGINE_ONLINE
+    if online:
+        alpha, z_threshold = online_engine.get_parameters(config)
+        online_states = dict(online_states or {})
+        refit_every = 0
 
-        is_valid = True
-
-        # 1. Validar valores mínimos e máximos
-        if min_value is not None and value < min_value:
-            is_valid = False
-        if max_value is not None and value > max_value:
-            is_valid = False
+    analysis_variable = config["analysis_variable"]
+    series_column = config["series_column"]
 
-        # 2. Validar relação com a média dos valores anteriores
-        if validate_mean and not previous_data.empty:
-            mean_value = previous_data[analysis_variable].mean()
-            if value > mean_value * (1 + mean_threshold):
+    if series_stats is None:
+        with span("series_stats", rows=len(data)):
+            series_stats = compute_series_stats(data, config)
+    series_stats = {key: dict(stats) for key, stats in series_stats.items()}
+
+    values = pd.to_numeric(new_entries[analysis_variable], errors="coerce").to_numpy(dtype=float)
+    keys = new_entries[series_column].map(series_key).to_numpy()
+
+    # 1. Validar valores mínimos e máximos
+    rule_valid = np.ones(len(new_entries), dtype=bool)
+    if min_value is not None:
+        rule_valid &= ~(values < min_value)
+    if max_value is not None:
+        rule_valid &= ~(values > max_value)
+    static_valid = rule_valid.copy()
+
+    # 2 e 3. Média e último valor a partir das estatísticas de cada série
+    stats_frame = pd.DataFrame.from_dict(series_stats, orient="index", columns=["count", "sum", "last_id", "last_value"])
+    stats_frame = stats_frame.apply(pd.to_numeric, errors="coerce").reindex(keys)
+    mean_limits = (stats_frame["sum"] / stats_frame["count"].replace(0, np.nan) * (1 + mean_threshold)).to_numpy(dtype=float)
+    last_limits = (stats_frame["last_value"] * (1 + last_threshold)).to_numpy(dtype=float)
+    if validate_mean:
+        rule_valid &= ~(values > mean_limits)
+    if validate_last:
+        rule_valid &= ~(values > last_limits)
+
+    next_id = data["id"].max() + 1 if not data.empty else 1
+    next_id = max([next_id] + [stats["last_id"] + 1 for stats in series_stats.values() if stats["last_id"] is not None])
+
+    anomalias = np.zeros(len(new_entries), dtype=bool)
+    correcao_sugerida = np.full(len(new_entries), None, dtype=object)
+    updated_keys, accepted_rows = set(), []
+
+    models_stale = not online
+    for position in range(len(new_entries)):
+        if models_stale:
+            if accepted_rows:
+                data = pd.concat([data, pd.DataFrame(accepted_rows)], ignore_index=True)
+                accepted_rows = []
+            # Modelos já carregados do cache são usados no primeiro lote
+            if models is None or position > 0:
+                models = fit_models(data, config)
+            is_anomaly_batch, suggested_batch = score_entries(models, new_entries.iloc[position:], config)
+            batch_start, accepted_since_fit, models_stale = position, 0, False
+
+        key = keys[position]
+        value = values[position]
+        is_valid = rule_valid[position]
+
+        # Séries que receberam valores aceitos neste lote são reavaliadas com as estatísticas atualizadas
+        if key in updated_keys:
+            mean_limit, last_limit = _rule_limits(series_stats[key], mean_threshold, last_threshold)
+            is_valid = static_valid[position]
+            if validate_mean and value > mean_limit:
                 is_valid = False
-
-        # 3. Validar relação com o último valor lançado
-        if validate_last and not previous_data.empty:
-            last_value = previous_data.sort_values("id").iloc[-1][analysis_variable]
-            if value > last_value * (1 + last_threshold):
+            if validate_last and value > last_limit:
                 is_valid = False
 
-        # 4. IA: Detectar anomalias e sugerir valores
-        is_anomaly_ia, suggested_value = detect_anomalies_with_prediction(data, pd.DataFrame([row]), config)
-
+        # 4. IA: Detectar anomalias e sugerir valores (pontuação calculada em lote)
+        if online:
+            is_anomaly_ia, suggested_value = online_engine.score(online_states.get(key), value, z_threshold)
+        else:
+            is_anomaly_ia = bool(is_anomaly_batch[position - batch_start])
+            suggested_value = suggested_batch[position - batch_start]
         is_anomaly = not is_valid or is_anomaly_ia
-        anomalias.append(is_anomaly)
-        correcao_sugerida.append(suggested_value if is_anomaly else None)
 
-        if not is_anomaly:
-            validated_row = row.copy()
-            validated_row["id"] = data["id"].max() + 1
-            validated_row["anomalia"] = False
-            validated_row["correcao_sugerida"] = None
-            data = pd.concat([data, pd.DataFrame([validated_row])], ignore_index=True)
+        anomalias[position] = is_anomaly
+        if is_anomaly:
+            correcao_sugerida[position] = suggested_value
+        else:
+            if key is not None:
+                stats = series_stats.setdefault(key, {"count": 0, "sum": 0.0, "last_id": None, "last_value": None})
+                if not np.isnan(value):
+                    stats["count"] += 1
+                    stats["sum"] += value
+                stats["last_id"] = next_id
+                stats["last_value"] = value
+                updated_keys.add(key)
+
+                if online:
+                    online_states[key] = online_engine.update(online_states.get(key), value, alpha, z_threshold)
+
+            if refit_every:
+                validated_row = new_entries.iloc[position].copy()
+                validated_row["id"] = next_id
+                validated_row["anomalia"] = False
+                validated_row["correcao_sugerida"] = None
+                accepted_rows.append(validated_row)
+
+                accepted_since_fit += 1
+                if accepted_since_fit >= refit_every:
+                    models_stale = True
+            next_id += 1
 
+    new_entries["anomalia"] = anomalias
+    new_entries["correcao_sugerida"] = correcao_sugerida
 
-        print(f"Validado: {is_valid}, Validado por IA: {not is_anomaly_ia}")
+    return new_entries
+
+
+def rescore_entries(data: pd.DataFrame, config: dict, models=None):
+    # Reavalia a série inteira a partir do zero: a IA pontua todas as linhas em uma única
+    # chamada e só as regras de média/último valor, que dependem das linhas aceitas
+    # anteriores de cada série, percorrem os valores em ordem de id
+    validations = config.get("validations", {})
+    min_value = validations.get("min_value", None)
+    max_value = validations.get("max_value", None)
+    validate_mean = validations.get("validate_mean", False)
+    mean_threshold = validations.get("mean_threshold", 20) / 100
+    validate_last = validations.get("validate_last", False)
+    last_threshold = validations.get("last_threshold", 40) / 100
+    online = online_engine.get_engine(config) == online_engine.ENGINE_ONLINE
+
+    values = pd.to_numeric(data[config["analysis_variable"]], errors="coerce").to_numpy(dtype=float)
+    static_valid = np.ones(len(data), dtype=bool)
+    if min_value is not None:
+        static_valid &= ~(values < min_value)
+    if max_value is not None:
+        static_valid &= ~(values > max_value)
+
+    if online:
+        is_anomaly_ia, suggested = np.zeros(len(data), dtype=bool), np.full(len(data), None, dtype=object)
+    else:
+        is_anomaly_ia, suggested = score_entries(models, data, config)
+
+    if not (validate_mean or validate_last or online):
+        anomalias = ~static_valid | is_anomaly_ia
+        return anomalias, np.where(anomalias, suggested, None)
+
+    with span("rescore_rules", rows=len(data)):
+        keys = data[config["series_column"]].map(series_key)
+        codes, _ = pd.factorize(keys)
+        counts = np.zeros(codes.max() + 1 if len(codes) else 0)
+        sums = np.zeros_like(counts)
+        lasts = np.full_like(counts, np.nan)
+        if online:
+            alpha, z_threshold = online_engine.get_parameters(config)
+            states = [None] * len(counts)
+
+        anomalias = np.zeros(len(data), dtype=bool)
+        suggested = suggested.copy()
+        for position, (code, value, is_valid) in enumerate(zip(codes.tolist(), values.tolist(), static_valid.tolist())):
+            if code >= 0:
+                if validate_mean and counts[code] and value > sums[code] / counts[code] * (1 + mean_threshold):
+                    is_valid = False
+                if validate_last and value > lasts[code] * (1 + last_threshold):
+                    is_valid = False
+            if online:
+                is_anomaly_ia_row, suggested[position] = online_engine.score(states[code] if code >= 0 else None, value, z_threshold)
+            else:
+                is_anomaly_ia_row = is_anomaly_ia[position]
+
+            if not is_valid or is_anomaly_ia_row:
+                anomalias[position] = True
+            elif code >= 0:
+                if value == value:
+                    counts[code] += 1
+                    sums[code] += value
+                lasts[code] = value
+                if online:
+                    states[code] = online_engine.update(states[code], values[position], alpha, z_threshold)
+
+    return anomalias, np.where(anomalias, suggested, None)
+
+
+def _validate_shard(shard, config, series_stats, models_payload):
+    models = pickle.loads(models_payload)
+    return validate_and_suggest(pd.DataFrame(), shard, config, refit_every=0, series_stats=series_stats, models=models)
+
+
+def _get_pool():
+    # Os processos partem do forkserver e não de um fork do servidor, que tem várias threads:
+    # uma trava mantida por outra thread no momento do fork (ex.: diagnostics) travaria o filho
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = get_context("forkserver")
+            context.set_forkserver_preload(["services.validation_service"])
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=context)
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def validate_and_suggest_parallel(data, new_entries: pd.DataFrame, config: dict, series_stats: dict = None, models=None, max_workers: int = None):
+    with span("validate_and_suggest_parallel", rows=len(new_entries)):
+        return _validate_and_suggest_parallel(data, new_entries, config, series_stats, models, max_workers)
+
+
+def _validate_and_suggest_parallel(data, new_entries, config, series_stats, models, max_workers):
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if series_stats is None:
+        series_stats = compute_series_stats(data, config)
+    if models is None:
+        models = fit_models(data, config)
+
+    # As regras de média e último valor são independentes entre séries, então cada
+    # processo recebe um grupo de séries inteiro, na ordem original das linhas
+    keys = new_entries[config["series_column"]].map(series_key).fillna("")
+    positions = pd.Series(np.arange(len(new_entries)), index=keys.to_numpy())
+    key_sizes = keys.value_counts()
+
+    n_shards = min(max_workers, len(key_sizes))
+    if n_shards <= 1 or len(new_entries) < PARALLEL_MIN_ROWS:
+        return validate_and_suggest(data, new_entries, config, refit_every=0, series_stats=series_stats, models=models)
+
+    shard_keys, shard_sizes = [[] for _ in range(n_shards)], [0] * n_shards
+    for key, size in key_sizes.items():
+        target = shard_sizes.index(min(shard_sizes))
+        shard_keys[target].append(key)
+        shard_sizes[target] += size
+
+    shard_positions = [np.sort(positions.loc[keys_in_shard].to_numpy()) for keys_in_shard in shard_keys]
+    shards = [new_entries.iloc[shard] for shard in shard_positions]
+    shard_stats = [{key: series_stats[key] for key in keys_in_shard if key in series_stats} for keys_in_shard in shard_keys]
+
+    # Os modelos são serializados uma única vez por bloco, não uma vez por processo
+    models_payload = pickle.dumps(models, protocol=pickle.HIGHEST_PROTOCOL)
+
+    anomalias = np.zeros(len(new_entries), dtype=bool)
+    correcao_sugerida = np.full(len(new_entries), None, dtype=object)
+    pool = _get_pool()
+    try:
+        results = pool.map(_validate_shard, shards, [config] * n_shards, shard_stats, [models_payload] * n_shards)
+        for shard, result in zip(shard_positions, results):
+            anomalias[shard] = result["anomalia"].to_numpy()
+            correcao_sugerida[shard] = result["correcao_sugerida"].to_numpy()
+    except BrokenProcessPool:
+        # Um processo encerrado inutiliza o pool; o próximo bloco cria outro
+        _discard_pool(pool)
+        raise
 
     new_entries["anomalia"] = anomalias
     new_entries["correcao_sugerida"] = correcao_sugerida
@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
 from database.configuration_service import save_configuration, get_all_configurations, update_configuration
-from database.dynamic_table_service import create_dynamic_table, load_columns_info, save_data
+from database.dynamic_table_service import create_dynamic_table, load_columns_info
+from services.import_service import CHUNK_SIZE, read_sample, count_rows, profile_columns
+from services.job_runner import submit_import, submit_rescore
+from services.online_engine import ENGINES, ENGINE_BATCH, ENGINE_ONLINE, DEFAULT_Z_THRESHOLD
+from services.training_policy import POLICIES, POLICY_ALL, POLICY_WINDOW, POLICY_PERIODS, POLICY_RESERVOIR, DEFAULT_WINDOW, DEFAULT_PERIODS, DEFAULT_RESERVOIR_SIZE
+from views.jobs_panel import show_jobs
 
 
 def initialize_series_configurations():
@@ -17,18 +22,31 @@ def initialize_series_configurations():
         st.warning("Nenhuma configuração encontrada. Por favor, crie uma configuração.")
 
 
+def load_file_summary(uploaded_file):
+    # A planilha é lida em blocos uma única vez por arquivo; reruns reutilizam o resumo
+    file_key = (uploaded_file.name, uploaded_file.size)
+    summary = st.session_state.get("file_summary")
+    if summary is None or summary["file_key"] != file_key:
+        summary = {
+            "file_key": file_key,
+            "sample": read_sample(uploaded_file, CHUNK_SIZE),
+            "profile": profile_columns(uploaded_file),
+            "rows": count_rows(uploaded_file),
+        }
+        st.session_state["file_summary"] = summary
+    return summary
+
+
 def register_serie(): 
     uploaded_file = st.file_uploader("Carregar Dados (Excel/CSV)", type=["csv", "xlsx"])
     if uploaded_file:
         try:
-            if uploaded_file.name.endswith(".csv"):
-                data = pd.read_csv(uploaded_file)
-            else:
-                data = pd.read_excel(uploaded_file)
+            summary = load_file_summary(uploaded_file)
+            data, profile = summary["sample"], summary["profile"]
 
             st.success("Planilha carregada com sucesso!")
-            st.write("Dados Detectados:")
-            st.dataframe(data)
+            st.write(f"Dados Detectados ({summary['rows']} linhas, exibindo uma amostra):")
+            st.dataframe(data.head(100))
 
             st.write("### Configurações de Série")
 
@@ -55,21 +73,30 @@ def register_serie():
             for col in data.columns:
                 if col == analysis_variable:
                     continue
-                if pd.api.types.is_numeric_dtype(data[col]):
-                    if pd.api.types.is_integer_dtype(data[col]):
-                        min_value, max_value = int(data[col].min()), int(data[col].max())
+                column_profile = profile[col]
+                if column_profile["numeric"] and column_profile["min"] is not None:
+                    if column_profile["integer"]:
+                        min_value, max_value = int(column_profile["min"]), int(column_profile["max"])
                     else:
-                        min_value, max_value = float(data[col].min()), float(data[col].max())                    
+                        min_value, max_value = float(column_profile["min"]), float(column_profile["max"])                    
                     
                     filters[col] = st.slider(
                         f"Filtrar por {col} (intervalo)", min_value=min_value, max_value=max_value, value=(min_value, max_value)
                     )
                 else:
-                    unique_values = data[col].unique()
+                    unique_values = sorted(column_profile["values"], key=str)
                     if len(unique_values) <= 10:
                         filters[col] = st.multiselect(f"Filtrar por {col}", options=unique_values, default=unique_values)
 
             st.write("### Configurações de Validação da IA")
+            engine = st.selectbox("Motor de detecção", options=list(ENGINES), format_func=ENGINES.get)
+            z_threshold = st.number_input(
+                "Limite de desvios padrão (motor online)",
+                value=DEFAULT_Z_THRESHOLD,
+                min_value=0.5,
+                step=0.5,
+                disabled=engine != ENGINE_ONLINE,
+            )
             contamination = st.number_input(
                "Taxa de Contaminação (em %)",
                 value=0.5,
@@ -77,9 +104,13 @@ def register_serie():
                 max_value=50.0,
                 step=0.1,
             )            
+            training_options = configure_training_policy({})
+            shard_key = configure_shard_key({}, auxiliary_variables, engine)
             
             st.write("### Configurações de Validação")
-            validation_options = {}
+            validation_options = {"engine": engine, **training_options, "shard_key": shard_key}
+            if engine == ENGINE_ONLINE:
+                validation_options["z_threshold"] = z_threshold
 
             if st.checkbox("Definir valores mínimos e máximos?"):
                 min_value = st.number_input(f"Valor mínimo para {analysis_variable}", value=0.0, step=0.1)
@@ -99,7 +130,9 @@ def register_serie():
                 validation_options["validate_last"] = validate_last
                 validation_options["last_threshold"] = last_threshold
 
-            
+
+            parallel = st.checkbox("Validar em paralelo por série (recomendado para planilhas grandes)")
+
             if st.button("Salvar Configurações"):
                 config = {
                     "nome_serie": nome_serie,
@@ -114,14 +147,58 @@ def register_serie():
                 st.session_state["config"] = config
                 save_configuration(config)
                 
-                create_dynamic_table(dynamic_table_name, data)                
-                save_data(dynamic_table_name, data, config)
-                st.success("Configurações salvas com sucesso!")
+                create_dynamic_table(dynamic_table_name, data)
+
+                submit_import(nome_serie, uploaded_file, summary["rows"], parallel=parallel)
+                st.success("Configurações salvas com sucesso! A importação dos dados continua em segundo plano.")
 
         except Exception as e:
             st.error(f"Erro ao carregar a planilha: {e}")
 
 
+def configure_training_policy(config):
+    # Limita o conjunto de treino dos modelos para o custo de cada validação não crescer com o histórico
+    validations = config.get("validations") or {}
+    policy_options = list(POLICIES)
+    current_policy = validations.get("training_policy") or (POLICY_WINDOW if validations.get("history_window") else POLICY_ALL)
+    policy = st.selectbox(
+        "Conjunto de treino dos modelos",
+        options=policy_options,
+        index=policy_options.index(current_policy),
+        format_func=POLICIES.get,
+    )
+    options = {"training_policy": policy, "history_window": None, "training_periods": None, "reservoir_size": None}
+    if policy == POLICY_WINDOW:
+        options["history_window"] = int(st.number_input(
+            "Registros mais recentes por série", value=int(validations.get("history_window") or DEFAULT_WINDOW), min_value=1, step=100
+        ))
+    elif policy == POLICY_PERIODS:
+        options["training_periods"] = int(st.number_input(
+            f"Últimos períodos de {config.get('series_column', 'série')}", value=int(validations.get("training_periods") or DEFAULT_PERIODS), min_value=1, step=1
+        ))
+    elif policy == POLICY_RESERVOIR:
+        options["reservoir_size"] = int(st.number_input(
+            "Tamanho da amostra por série", value=int(validations.get("reservoir_size") or DEFAULT_RESERVOIR_SIZE), min_value=1, step=50
+        ))
+    options["max_training_rows"] = int(st.number_input(
+        "Limite total de linhas de treino (0 = sem limite)", value=int(validations.get("max_training_rows") or 0), min_value=0, step=1000
+    )) or None
+    return options
+
+
+def configure_shard_key(config, auxiliary_variables, engine):
+    # Um modelo menor por valor da coluna escolhida (ex.: por raça), treinados em paralelo
+    options = [None] + [col for col in auxiliary_variables if col != config.get("analysis_variable")]
+    current = (config.get("validations") or {}).get("shard_key")
+    return st.selectbox(
+        "Treinar um modelo separado por",
+        options=options,
+        index=options.index(current) if current in options else 0,
+        format_func=lambda col: "Modelo único para todos os dados" if col is None else col,
+        disabled=engine == ENGINE_ONLINE,
+    )
+
+
 def select_config():
     configuracoes = get_all_configurations()
 
@@ -149,7 +226,7 @@ def select_config():
             st.write("Nenhuma variável auxiliar definida.")
 
         st.markdown("#### Ações")
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
 
         with col1:
             if st.button("Ativar Configuração"):
@@ -157,8 +234,17 @@ def select_config():
                 st.success(f"A configuração '{selected_config}' foi ativada com sucesso!")
 
         with col2:
+            # O formulário continua aberto nos reruns seguintes, até ser salvo
             if st.button("Editar Configuração"):
-                edit_configuration(selected_config_details)
+                st.session_state["editing_config"] = selected_config
+
+        with col3:
+            if st.button("Reavaliar Registros"):
+                submit_rescore(selected_config)
+                st.success("Reavaliação iniciada! Todos os registros serão validados novamente com a configuração atual.")
+
+        if st.session_state.get("editing_config") == selected_config:
+            edit_configuration(selected_config_details)
 
 
 def edit_configuration(config):
@@ -231,11 +317,29 @@ def edit_configuration(config):
 
     contamination = st.number_input(
         "Taxa de Contaminação (em %)",
-        value=validations.get("contamination", 0.005) * 100.0,
+        value=float(config.get("contamination") or 0.005) * 100.0,
         min_value=0.5,
         max_value=50.0,
         step=0.1,
     )
+    training_options = configure_training_policy(config)
+
+    engine_options = list(ENGINES)
+    engine = st.selectbox(
+        "Motor de detecção",
+        options=engine_options,
+        index=engine_options.index(validations.get("engine", ENGINE_BATCH)),
+        format_func=ENGINES.get,
+    )
+    z_threshold = st.number_input(
+        "Limite de desvios padrão (motor online)",
+        value=float(validations.get("z_threshold", DEFAULT_Z_THRESHOLD)),
+        min_value=0.5,
+        step=0.5,
+        disabled=engine != ENGINE_ONLINE,
+    )
+    shard_key = configure_shard_key(config, auxiliary_variables, engine)
+    rescore = st.checkbox("Reavaliar todos os registros com a nova configuração", value=True)
 
     if st.button("Salvar Alterações"):
         updated_config = {
@@ -245,23 +349,33 @@ def edit_configuration(config):
             "auxiliary_variables": auxiliary_variables,
             "filters": updated_filters,
             "validations": {
+                **validations,
                 "min_value": min_value,
                 "max_value": max_value,
                 "validate_mean": validate_mean,
                 "mean_threshold": mean_threshold,
                 "validate_last": validate_last,
                 "last_threshold": last_threshold,
-                "contamination": contamination / 100.0,
+                **training_options,
+                "shard_key": shard_key,
+                "engine": engine,
+                "z_threshold": z_threshold,
             },
+            "contamination": contamination / 100.0,
             "dynamic_table_name": config["dynamic_table_name"],
         }
 
         update_configuration(nome_serie, updated_config)
+        if rescore:
+            submit_rescore(nome_serie)
+        st.session_state.pop("editing_config", None)
         st.success("Configuração salva com sucesso!")
 
 def configure_series():
     st.write("### Configurar Série a partir da Planilha")
     register_serie()
+    if st.session_state.get("config"):
+        show_jobs(st.session_state["config"]["nome_serie"])
     st.divider()
     st.write("### Selecionar Configuração de Série")
     select_config()
@@ -0,0 +1,41 @@
+import pandas as pd
+import streamlit as st
+from services.diagnostics import get_spans, get_counters, export_json, reset
+
+
+def show_diagnostics():
+    st.write("### Diagnóstico de Desempenho")
+
+    counters = get_counters()
+    if counters:
+        columns = st.columns(min(len(counters), 4))
+        for index, (counter, value) in enumerate(sorted(counters.items())):
+            columns[index % len(columns)].metric(counter, f"{value:,}".replace(",", "."))
+    else:
+        st.info("Nenhum contador registrado ainda.")
+
+    spans = pd.DataFrame(get_spans())
+    if spans.empty:
+        st.info("Nenhuma etapa medida ainda. Cadastre, edite ou visualize dados para gerar medições.")
+    else:
+        st.write("#### Tempo por etapa (ms)")
+        summary = spans.groupby("stage")["duration_ms"].agg(
+            execucoes="count",
+            total="sum",
+            media="mean",
+            p95=lambda durations: durations.quantile(0.95),
+        )
+        st.dataframe(summary.sort_values("total", ascending=False).round(3), use_container_width=True)
+
+        st.write("#### Medições recentes")
+        recent = spans.sort_values("timestamp", ascending=False)
+        recent["timestamp"] = pd.to_datetime(recent["timestamp"], unit="s")
+        st.dataframe(recent, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Exportar JSON", data=export_json(), file_name="diagnostico.json", mime="application/json")
+    with col2:
+        if st.button("Limpar medições"):
+            reset()
+            st.rerun()
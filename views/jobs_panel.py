@@ -0,0 +1,33 @@
+import streamlit as st
+from database.job_service import list_jobs, ACTIVE_STATUSES, JOB_FAILED
+from services.job_runner import JOB_LABELS, STATUS_LABELS, cancel_job, resume_job
+
+POLL_SECONDS = 2
+RECENT_JOBS = 5
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def show_jobs(nome_serie: str):
+    # Atualizado periodicamente sem bloquear o restante da página
+    jobs = list_jobs(nome_serie, limit=RECENT_JOBS)
+    if not jobs:
+        return
+
+    st.write("#### Processamentos em segundo plano")
+    for job in jobs:
+        label = f"{JOB_LABELS.get(job['kind'], job['kind'])} #{job['id']} - {STATUS_LABELS.get(job['status'], job['status'])}"
+        total = job["total_rows"]
+        done = job["processed_rows"]
+        text = f"{label}: {done} de {total} linhas, {job['anomalies']} anomalias" if total else f"{label}: {done} linhas"
+        st.progress(min(done / total, 1.0) if total else 0.0, text=text)
+
+        if job["message"]:
+            st.caption(job["message"])
+        if job["status"] in ACTIVE_STATUSES and not job["cancel_requested"]:
+            if st.button("Cancelar", key=f"cancel_job_{job['id']}"):
+                cancel_job(job["id"])
+                st.rerun(scope="fragment")
+        elif job["status"] == JOB_FAILED:
+            if st.button("Retomar", key=f"resume_job_{job['id']}"):
+                resume_job(job["id"])
+                st.rerun(scope="fragment")
@@ -1,6 +1,9 @@
 import pandas as pd
 import streamlit as st
 from database.dynamic_table_service import save_data, load_columns_info
+from services.import_service import read_sample, count_rows
+from services.job_runner import submit_import
+from views.jobs_panel import show_jobs
 
 def show_register():
     config = st.session_state.get("config", {})
@@ -61,21 +64,21 @@ def show_register():
     uploaded_file = st.file_uploader("Escolha um arquivo Excel ou CSV", type=["xlsx", "csv"])
     if uploaded_file:
         try:
-            if uploaded_file.name.endswith(".xlsx"):
-                imported_data = pd.read_excel(uploaded_file)
-            else:
-                imported_data = pd.read_csv(uploaded_file)
+            imported_data = read_sample(uploaded_file)
 
-            st.write("### Dados Importados")
+            st.write("### Dados Importados (amostra)")
             st.dataframe(imported_data)
 
             required_columns = set(config["auxiliary_variables"] + [config["series_column"], config["analysis_variable"]])
             if not required_columns.issubset(imported_data.columns):
                 st.error(f"A planilha deve conter as colunas: {', '.join(required_columns)}")
             else:
+                parallel = st.checkbox("Validar em paralelo por série (recomendado para planilhas grandes)")
                 if st.button("Salvar Dados Importados"):
-                    save_data(config["dynamic_table_name"], imported_data, config)
-                    st.success("Dados importados e salvos com sucesso!")
+                    submit_import(config["nome_serie"], uploaded_file, count_rows(uploaded_file), parallel=parallel)
+                    st.success("Importação iniciada! O progresso é exibido abaixo e continua mesmo se a página for fechada.")
 
         except Exception as e:
             st.error(f"Erro ao processar o arquivo: {e}")
+
+    show_jobs(config["nome_serie"])
@@ -1,9 +1,13 @@
 import pandas as pd
 import streamlit as st
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from database.dynamic_table_service import load_data, update_data
+from st_aggrid import AgGrid, GridOptionsBuilder
+from database.dynamic_table_service import load_data, update_data, apply_edits, count_rows, load_filter_options
+from database.query_cache import get_version
+from services.chart_service import ZOOM_LEVELS, zoom_levels
 import altair as alt
 
+PAGE_SIZES = [50, 100, 500, 1000]
+
 
 def show_visualization():
     config = st.session_state.get("config", {})
@@ -14,33 +18,40 @@ def show_visualization():
     st.write(f"### Dados da Série: {config['nome_serie']}")
 
     table_name = config["dynamic_table_name"]
-    data = load_data(table_name)
+    filter_options = load_filter_options(table_name, config)
 
-    filters = configure_filters(data, config)
-    filtered_data = apply_filters(data, filters)
+    filters = configure_filters(filter_options, config)
+    total_rows = count_rows(table_name, filters)
 
-    if filtered_data.empty:
+    if not total_rows:
         st.warning("Nenhum dado cadastrado ainda com os filtros aplicados.")
     else:
-        show_grid(filtered_data, config)
+        col1, col2 = st.columns(2)
+        with col1:
+            page_size = st.selectbox("Linhas por página", options=PAGE_SIZES, index=1)
+        total_pages = (total_rows - 1) // page_size + 1
+        with col2:
+            page = st.number_input(f"Página (de {total_pages})", min_value=1, max_value=total_pages, value=1, step=1)
+
+        page_data = load_data(table_name, filters=filters, limit=page_size, offset=(page - 1) * page_size)
+        show_grid(page_data, config)
         st.divider()
-        show_graph(filtered_data, config)
-
 
-def configure_filters(data, config):
-    filters = {}
-    for col in data.columns:
-        if col in ["id", "anomalia", "correcao_sugerida"]:  
-            continue
+        chart_columns = ["id", "anomalia", "correcao_sugerida", config["series_column"], config["analysis_variable"]]
+        chart_columns += [col for col in config["auxiliary_variables"][:1] if col not in chart_columns]
+        show_graph(load_data(table_name, filters=filters, columns=chart_columns), config, filters)
 
-        if col == config["analysis_variable"]:  
-            continue
 
-        if pd.api.types.is_numeric_dtype(data[col]):
-            if pd.api.types.is_integer_dtype(data[col]):
-                min_value, max_value = int(data[col].min()), int(data[col].max())
+def configure_filters(filter_options, config):
+    filters = {}
+    for col, options in filter_options.items():
+        if "values" not in options:
+            if options["min"] is None:
+                continue
+            if options["integer"]:
+                min_value, max_value = int(options["min"]), int(options["max"])
             else:
-                min_value, max_value = float(data[col].min()), float(data[col].max())
+                min_value, max_value = float(options["min"]), float(options["max"])
             filters[col] = st.slider(
                 f"Filtrar por {col} (intervalo)",
                 min_value=min_value,
@@ -48,22 +59,22 @@ def configure_filters(data, config):
                 value=(min_value, max_value),
             )
         else:
-            unique_values = data[col].unique()
+            unique_values = options["values"]
             filters[col] = st.multiselect(f"Filtrar por {col}", options=unique_values, default=unique_values)
 
     return filters
 
 
 def apply_filters(data, filters):
-    filtered_data = data.copy()
+    mask = pd.Series(True, index=data.index)
     for col, condition in filters.items():
         if isinstance(condition, tuple):  
-            filtered_data = filtered_data[(filtered_data[col] >= condition[0]) & (filtered_data[col] <= condition[1])]
+            mask &= (data[col] >= condition[0]) & (data[col] <= condition[1])
         elif isinstance(condition, list): 
             if condition:
-                filtered_data = filtered_data[filtered_data[col].isin(condition)]
+                mask &= data[col].isin(condition)
 
-    return filtered_data
+    return data[mask]
 
 
 def show_grid(data, config):
@@ -81,26 +92,63 @@ def show_grid(data, config):
     grid_response = AgGrid(
         data,
         gridOptions=grid_options,
-        update_mode=GridUpdateMode.VALUE_CHANGED,
+        update_on=["cellValueChanged"],
         theme="streamlit",
     )
 
-    updated_data = grid_response["data"]
-    changes_detected = data.compare(updated_data)
+    # As edições vêm dos eventos de célula e ficam na sessão; o quadro exibido não é comparado
+    table_name = config["dynamic_table_name"]
+    track_edit(table_name, grid_response.event_data)
+    edits = pending_edits(table_name)
+
+    if edits:
+        st.warning(f"{len(edits)} registro(s) alterado(s). Clique em 'Salvar Alterações' para confirmar.")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Salvar Alterações"):
+                apply_edits(table_name, edits, config)
+                edits.clear()
+                st.rerun()
+        with col2:
+            if st.button("Descartar Alterações"):
+                edits.clear()
+                st.rerun()
 
-    if not changes_detected.empty:
-        st.warning("Alterações detectadas. Clique em 'Salvar Alterações' para confirmar.")
-        if st.button("Salvar Alterações"):
-            altered_rows = updated_data.loc[changes_detected.index]
-            update_data(config["dynamic_table_name"], altered_rows, config)
 
+def pending_edits(table_name):
+    return st.session_state.setdefault("grid_edits", {}).setdefault(table_name, {})
 
-def show_graph(data, config):
+
+def track_edit(table_name, event):
+    if not event or event.get("type") != "cellValueChanged":
+        return
+    # O último evento do grid é reenviado a cada rerun e só deve ser registrado uma vez
+    last_events = st.session_state.setdefault("grid_last_event", {})
+    if last_events.get(table_name) == event:
+        return
+    last_events[table_name] = event
+
+    row_id = (event.get("data") or {}).get("id")
+    col = (event.get("colDef") or {}).get("field")
+    if row_id is not None and col is not None:
+        pending_edits(table_name).setdefault(int(row_id), {})[col] = event.get("newValue")
+
+
+def show_graph(data, config, filters=None):
     st.write(f"### Gráfico de {config['analysis_variable']} com Detecção de Anomalias")
     filtered_data = data[data["anomalia"] == False]
     anomalias = data[data["anomalia"] == True]
 
-    mark_line = alt.Chart(filtered_data).mark_line(point=True).encode(
+    # A linha é reduzida no servidor; os pontos anômalos são sempre enviados
+    level = st.select_slider("Nível de detalhe do gráfico", options=list(ZOOM_LEVELS), value="Médio")
+    group_column = config["auxiliary_variables"][0] if config["auxiliary_variables"] else None
+    cache_key = (config["dynamic_table_name"], repr(filters), get_version(config["dynamic_table_name"]))
+    line_data = zoom_levels(
+        cache_key, filtered_data, config["series_column"], config["analysis_variable"], group_column
+    )[level]
+    alt.data_transformers.disable_max_rows()
+
+    mark_line = alt.Chart(line_data).mark_line(point=True).encode(
         x=alt.X(config["series_column"] + ":O", title=config["series_column"].capitalize()),
         y=alt.Y(config["analysis_variable"] + ":Q", title=config["analysis_variable"].capitalize()),
         color=alt.Color(config["auxiliary_variables"][0] + ":N", title=config["auxiliary_variables"][0].capitalize())
@@ -163,7 +211,8 @@ def show_graph(data, config):
             )
 
             if st.button("Salvar Correção"):
-                selected_row = selected_row.to_dict()  
+                # O gráfico carrega apenas algumas colunas; a linha completa é buscada pelo id
+                selected_row = load_data(config["dynamic_table_name"], filters={"id": [int(selected_id)]}).iloc[0].to_dict()
                 selected_row[analysis_variable] = new_value                
                 update_data(config["dynamic_table_name"], pd.DataFrame([selected_row]), config)
                 st.success(f"Correção do ID {selected_id} salva com sucesso!")